@@ -1,5 +1,6 @@
 '''Directed graph and associated algorithms.
 '''
+import numpy as np
 from collections import (defaultdict, deque)
 
 
@@ -12,6 +13,9 @@ class DirectedGraph:
 
         # empty in degrees: node -> int
         self.__in_degrees = defaultdict(int)
+
+        # topological order: cached until the graph is changed
+        self.__sorted_nodes = None
     
 
     def __str__(self) -> str:
@@ -35,11 +39,17 @@ class DirectedGraph:
         if node_from not in self.__in_degrees:
             self.__in_degrees[node_from] = 0
         self.__in_degrees[node_to] += 1
+        self.__sorted_nodes = None
 
 
     def sort(self) -> list:
-        '''Sort nodes in topological order.
+        '''Sort nodes in topological order. The order is cached until an edge is added.
         '''
+        if self.__sorted_nodes is None: self.__sorted_nodes = self.__sort()
+        return list(self.__sorted_nodes)
+
+
+    def __sort(self) -> list:
         res = []
 
         # collect nodes with zero in degree
@@ -106,4 +116,354 @@ class DirectedGraph:
                 if dist[adj_node] < new_length:
                     dist[adj_node] = new_length
         
-        return dist[node_to]
\ No newline at end of file
+        return dist[node_to]
+
+
+    def heads_and_tails(self, fun_weight) -> tuple:
+        '''Longest path length from the sources to each node (head), and from each node to the
+        sinks (tail), see `IndexedGraph.heads_and_tails()`. The weight of a node is excluded 
+        from both its head and tail, so head + weight + tail is the length of the longest path 
+        through the node.
+
+        Args:
+            fun_weight: Function handle taking a node as input, returns its weight, i.e. the
+                weight of edges ending at the node, same to `longest_path()`.
+
+        Returns:
+            tuple: ({node: head}, {node: tail}), or None if the graph is not acyclic.
+        '''
+        nodes = list(self.__in_degrees)
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = [(index[node], index[adj_node]) for node, adj_nodes in self.__adjacency.items() \
+                    for adj_node in adj_nodes]
+        res = IndexedGraph.from_edges(len(nodes), edges).heads_and_tails(list(map(fun_weight, nodes)))
+        if res is None: return None
+        heads, tails = res
+        return dict(zip(nodes, heads.tolist())), dict(zip(nodes, tails.tolist()))
+
+
+    def critical_path(self, fun_weight) -> list:
+        '''Nodes on a longest path of the graph, from a source node to a sink node.
+
+        Args:
+            fun_weight: Function handle taking a node as input, returns its weight.
+
+        Returns:
+            list: Nodes in the path, or empty list if the graph is not acyclic.
+        '''
+        res = self.heads_and_tails(fun_weight)
+        if not res: return []
+        heads, tails = res
+        length = lambda node: heads[node] + fun_weight(node) + tails[node]
+        node = max(heads, key=lambda node: (length(node), -heads[node]))
+        path = [node]
+        while True:
+            end = heads[node] + fun_weight(node)
+            node = next((adj_node for adj_node in self.__adjacency[node] \
+                            if heads[adj_node]==end and end+fun_weight(adj_node)+tails[adj_node]==length(path[0])), None)
+            if node is None: break
+            path.append(node)
+        return path
+
+
+class IndexedGraph:
+
+    def __init__(self, num:int, capacity:int=2) -> None:
+        '''Directed graph over dense integer nodes `0, 1, ..., num-1`, represented by NumPy arrays
+        in padded CSR layout: the successors of node i are the first `out_degree(i)` entries of 
+        row i in a fixed-stride array, and so are the predecessors. A row is enlarged when it is 
+        full, so edges are inserted and deleted in place without rebuilding the graph.
+
+        Once sorted, the topological order is maintained incrementally when edges are inserted: 
+        for an edge pointing backward in current order, only the nodes between its two ends are 
+        affected. The ones reachable from the end node are searched, which detects a cycle if 
+        the start node is reached, and then shifted right after the start node, while the others 
+        keep their relative order (Marchetti-Spaccamela et al., 1996; Pearce & Kelly, 2007). 
+        Deleting edges never violates the order. Changes after a checkpoint are recorded, so 
+        they can be undone.
+
+        Marchetti-Spaccamela, A., Nanni, U. and Rohnert, H. "Maintaining a topological order under 
+        edge insertions." Information Processing Letters 59.1 (1996): 53-58.
+
+        Pearce, D.J. and Kelly, P.H.J. "A dynamic topological sort algorithm for directed acyclic 
+        graphs." ACM Journal of Experimental Algorithmics 11 (2007): 1.7.
+
+        Args:
+            num (int): Count of nodes.
+            capacity (int, optional): Initial count of successors / predecessors per node, e.g. 2
+                for the flow chain and edge chain of an operation. Defaults to 2.
+        '''
+        self.__successors = np.full((num, capacity), -1, dtype=np.int64)
+        self.__predecessors = np.full((num, capacity), -1, dtype=np.int64)
+        self.__out_degrees = np.zeros(num, dtype=np.int64)
+        self.__in_degrees = np.zeros(num, dtype=np.int64)
+
+        # topological order and the position of each node in it: None until sorted
+        self.__order = None     # type: np.ndarray
+        self.__positions = None # type: np.ndarray
+
+        # changes after the outermost checkpoint: ('add', i, j), ('remove', i, j), 
+        # ('order', start position, old nodes in the range) or ('sort',)
+        self.__journal = None   # type: list
+
+
+    @property
+    def num_nodes(self) -> int: return self.__out_degrees.size
+
+    @property
+    def num_edges(self) -> int: return int(self.__out_degrees.sum())
+
+    @property
+    def is_sorted(self) -> bool:
+        '''If the topological order is available, i.e. sorted and maintained since then.'''
+        return self.__order is not None
+
+
+    @classmethod
+    def from_edges(cls, num:int, edges):
+        '''Create graph from all edges at once, where the adjacency rows are filled in bulk.
+
+        Args:
+            num (int): Count of nodes.
+            edges: Directed edges in array-like of shape (m, 2), i.e. [(node_from, node_to), ...].
+        '''
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        out_degrees = np.bincount(edges[:, 0], minlength=num)
+        in_degrees = np.bincount(edges[:, 1], minlength=num)
+        graph = cls(num, capacity=max(int(out_degrees.max(initial=0)), int(in_degrees.max(initial=0)), 1))
+        cls.__fill(graph.__successors, edges[:, 0], edges[:, 1], out_degrees)
+        cls.__fill(graph.__predecessors, edges[:, 1], edges[:, 0], in_degrees)
+        graph.__out_degrees[:] = out_degrees
+        graph.__in_degrees[:] = in_degrees
+        return graph
+
+
+    def successors(self, node:int) -> np.ndarray:
+        '''Succeeding nodes of `node`, i.e. a view of the adjacency row.'''
+        return self.__successors[node, :self.__out_degrees[node]]
+
+
+    def predecessors(self, node:int) -> np.ndarray:
+        '''Preceding nodes of `node`, i.e. a view of the adjacency row.'''
+        return self.__predecessors[node, :self.__in_degrees[node]]
+
+
+    def has_edge(self, node_from:int, node_to:int) -> bool:
+        '''If the directed edge from `node_from` to `node_to` exists.'''
+        return bool((self.successors(node_from)==node_to).any())
+
+
+    def position(self, node:int) -> int:
+        '''Position of `node` in the topological order, which is higher than all its predecessors.
+        Only available when `is_sorted`.'''
+        return int(self.__positions[node])
+
+
+    def add_edge(self, node_from:int, node_to:int) -> bool:
+        '''Add a directed edge from `node_from` to `node_to`, and update the topological order if 
+        the new edge points backward.
+
+        Returns:
+            bool: False if the new edge creates a cycle, and it is not added. Always True before
+                the graph is sorted, when the cycle is detected by `sort()` instead.
+        '''
+        positions = self.__positions
+        if positions is not None and positions[node_from] >= positions[node_to]:
+            forward = self.__search(node_to, node_from)
+            if forward is None: return False # node_from is reachable from node_to
+            self.__reorder(forward, int(positions[node_to]), int(positions[node_from]))
+
+        self.__insert(node_from, node_to)
+        if self.__journal is not None: self.__journal.append(('add', node_from, node_to))
+        return True
+
+
+    def remove_edge(self, node_from:int, node_to:int):
+        '''Remove the directed edge from `node_from` to `node_to`.'''
+        if not self.has_edge(node_from, node_to):
+            raise Exception('Edge not exist in current graph.')
+        self.__delete(node_from, node_to)
+        if self.__journal is not None: self.__journal.append(('remove', node_from, node_to))
+
+
+    def sort(self) -> np.ndarray:
+        '''Sort nodes in topological order. The order is then maintained when edges are changed.
+
+        Returns:
+            np.ndarray: Nodes in topological order, or None if the graph is not acyclic.
+        '''
+        if self.__order is None:
+            order = self.__sort()
+            if order is None: return None
+            self.__order = np.array(order, dtype=np.int64)
+            self.__positions = np.empty_like(self.__order)
+            self.__positions[self.__order] = np.arange(self.__order.size)
+            if self.__journal is not None: self.__journal.append(('sort',))
+        return self.__order.copy()
+
+
+    def heads_and_tails(self, weights, release_times=None, delivery_times=None) -> tuple:
+        '''Longest path length from the sources to each node (head), and from each node to the
+        sinks (tail), in one sweep over the topological order. The weight of a node is excluded 
+        from both its head and tail, so head + weight + tail is the length of the longest path 
+        through the node.
+
+        Args:
+            weights: Weight of each node in array-like, e.g. the duration of operation.
+            release_times (optional): The minimum head of each node in array-like, e.g. the 
+                fixed start time. Defaults to None, i.e. 0.
+            delivery_times (optional): The minimum tail of each node in array-like. Defaults to 
+                None, i.e. 0.
+
+        Returns:
+            tuple: (heads, tails) in np.ndarray, or None if the graph is not acyclic.
+        '''
+        order = self.sort()
+        if order is None: return None
+        order = order.tolist()
+        num = len(order)
+        weights = np.asarray(weights, dtype=float).tolist()
+        heads = [0.0] * num if release_times is None else np.asarray(release_times, dtype=float).tolist()
+        tails = [0.0] * num if delivery_times is None else np.asarray(delivery_times, dtype=float).tolist()
+        successors = self.__successors.tolist()
+
+        for i in order:
+            end = heads[i] + weights[i]
+            for j in successors[i]:
+                if j<0: break # padding after the valid entries
+                if heads[j] < end: heads[j] = end
+        for i in reversed(order):
+            for j in successors[i]:
+                if j<0: break
+                tail = weights[j] + tails[j]
+                if tails[i] < tail: tails[i] = tail
+        return np.array(heads), np.array(tails)
+
+
+    def checkpoint(self) -> int:
+        '''Start recording the changes of edges and topological order, so that they can be undone
+        by `rollback()`. Checkpoints can be nested.
+
+        Returns:
+            int: Mark of the checkpoint.
+        '''
+        if self.__journal is None: self.__journal = []
+        return len(self.__journal)
+
+
+    def rollback(self, mark:int):
+        '''Undo the changes after checkpoint `mark` in the reversed order. Recording stops if it 
+        is the outermost checkpoint.'''
+        journal = self.__journal
+        while len(journal) > mark:
+            entry = journal.pop()
+            if entry[0]=='add':
+                self.__delete(entry[1], entry[2])
+            elif entry[0]=='remove': # the order at removal is still valid for the edge
+                self.__insert(entry[1], entry[2])
+            elif entry[0]=='order':
+                self.__shift(entry[1], entry[2])
+            else:
+                self.__order = self.__positions = None
+        if mark==0: self.__journal = None
+
+
+    def commit(self, mark:int):
+        '''Keep the changes after checkpoint `mark`. Recording stops if it is the outermost 
+        checkpoint.'''
+        if mark==0: self.__journal = None
+
+
+    def __sort(self) -> list:
+        '''Kahn's algorithm over the adjacency rows converted to lists.'''
+        num = self.num_nodes
+        successors = self.__successors.tolist()
+        out_degrees = self.__out_degrees.tolist()
+        in_degrees = self.__in_degrees.tolist()
+        res = [i for i in range(num) if in_degrees[i]==0]
+        for i in res: # extended when iterating
+            for j in successors[i][:out_degrees[i]]:
+                in_degrees[j] -= 1
+                if in_degrees[j]==0: res.append(j)
+        return res if len(res)==num else None
+
+
+    def __search(self, node:int, target:int) -> list:
+        '''Depth-first search from `node` along the successors, visiting only the nodes before 
+        `target` in topological order.
+
+        Returns:
+            list: Visited nodes, or None if `target` is reached.
+        '''
+        if node==target: return None
+        positions, successors = self.__positions, self.__successors
+        upper = positions[target]
+        visited, stack = {node}, [node]
+        while stack:
+            i = stack.pop()
+            for j in successors[i].tolist():
+                if j<0: break # padding after the valid entries
+                if j==target: return None
+                if j in visited or positions[j] > upper: continue
+                visited.add(j)
+                stack.append(j)
+        return list(visited)
+
+
+    def __reorder(self, forward:list, lower:int, upper:int):
+        '''Move the `forward` nodes, i.e. reachable from the node at position `lower`, right 
+        after the node at position `upper`, while the other nodes in between keep their relative 
+        order.'''
+        nodes = self.__order[lower:upper+1]
+        moved = np.zeros(nodes.size, dtype=bool)
+        moved[self.__positions[forward]-lower] = True
+        if self.__journal is not None: self.__journal.append(('order', lower, nodes.copy()))
+        self.__shift(lower, np.concatenate((nodes[~moved], nodes[moved])))
+
+
+    def __shift(self, lower:int, nodes:np.ndarray):
+        '''Place `nodes` in the order from position `lower`.'''
+        self.__order[lower:lower+nodes.size] = nodes
+        self.__positions[nodes] = np.arange(lower, lower+nodes.size)
+
+
+    def __insert(self, node_from:int, node_to:int):
+        '''Append the edge to the adjacency rows of both ends.'''
+        self.__successors = self.__append(self.__successors, self.__out_degrees, node_from, node_to)
+        self.__predecessors = self.__append(self.__predecessors, self.__in_degrees, node_to, node_from)
+
+
+    def __delete(self, node_from:int, node_to:int):
+        '''Remove the edge from the adjacency rows of both ends.'''
+        self.__remove(self.__successors, self.__out_degrees, node_from, node_to)
+        self.__remove(self.__predecessors, self.__in_degrees, node_to, node_from)
+
+
+    @staticmethod
+    def __fill(rows:np.ndarray, nodes:np.ndarray, adj_nodes:np.ndarray, degrees:np.ndarray):
+        '''Fill the adjacency rows with edges (nodes[k], adj_nodes[k]), grouped by node.'''
+        order = np.argsort(nodes, kind='stable')
+        nodes, adj_nodes = nodes[order], adj_nodes[order]
+        offsets = np.cumsum(degrees) - degrees
+        rows[nodes, np.arange(nodes.size)-offsets[nodes]] = adj_nodes
+
+
+    @staticmethod
+    def __append(rows:np.ndarray, degrees:np.ndarray, node:int, adj_node:int) -> np.ndarray:
+        '''Append `adj_node` to the row of `node`, where the stride is doubled if the row is full.'''
+        degree = degrees[node]
+        if degree==rows.shape[1]:
+            rows = np.concatenate((rows, np.full_like(rows, -1)), axis=1)
+        rows[node, degree] = adj_node
+        degrees[node] += 1
+        return rows
+
+
+    @staticmethod
+    def __remove(rows:np.ndarray, degrees:np.ndarray, node:int, adj_node:int):
+        '''Remove `adj_node` from the row of `node`, filled with the last entry of the row.'''
+        last = degrees[node] - 1
+        k = np.flatnonzero(rows[node, :last+1]==adj_node)[0]
+        rows[node, k] = rows[node, last]
+        rows[node, last] = -1
+        degrees[node] = last
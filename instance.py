@@ -31,7 +31,7 @@ if __name__=='__main__':
                 instance_detail = json.load(f)
             
             coflows = [CoFlow(f["flowid"], topo, nx.DiGraph(f["edges"])) for f in instance_detail["flows"]]
-            ops, path_ops = get_ops(coflows)
+            ops = get_ops(coflows)
             # ops = [TransOperation(op["opid"], Flow(op["flow"]), Edge(op["edge"]), op["duration"]) for 
             #        op in instance_detail["ops"]]
             # path_ops = [[TransOperation(op["opid"], Flow(op["flow"]), Edge(op["edge"]), op["duration"]) for 
@@ -40,7 +40,7 @@ if __name__=='__main__':
             # ----------------------------------------
             # solve cfs problem
             # ----------------------------------------
-            problem = CFSProblem(path_ops=path_ops, ops=ops)
+            problem = CFSProblem(ops=ops)
             
             instance_info.append({
                 "name": f'{instance_file}',
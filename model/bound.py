@@ -0,0 +1,124 @@
+'''Lower bounds of the makespan of CoFlow Schedule Problem, which tell how good a schedule is, and
+when to stop solving. They're based on the head and tail of each operation, i.e. the longest
+processing time before its start and after its completion in coflow DAG, which are calculated
+by `IndexedGraph.heads_and_tails()` over the position of operation in `CFSProblem.ops`:
+
+- critical path : the longest path of each coflow DAG, i.e. max(head + duration + tail)
+- edge load     : min head + total duration + min tail of the operations on each edge
+- Jackson       : optimal makespan of the one-machine preemptive relaxation of each edge, with
+                  heads as release times and tails as delivery times
+'''
+
+import heapq
+import numpy as np
+from collections import defaultdict
+from common.exception import JSPException
+from common.graph import IndexedGraph
+
+
+class LowerBounds:
+
+    def __init__(self, ops:list, precedence:dict) -> None:
+        '''Calculate heads and tails of all operations.
+
+        Args:
+            ops (list): Operations of the problem, i.e. `CFSProblem.ops`.
+            precedence (dict): Precedence of operations in coflow DAG, i.e. `CFSProblem.precedence`.
+        '''
+        index = {op: i for i, op in enumerate(ops)}
+        num = len(ops)
+        self.__durations = np.array([op.duration for op in ops], dtype=float)
+        edge_index = {}
+        self.__edges = np.array([edge_index.setdefault(op.edge, len(edge_index)) for op in ops], dtype=int)
+        self.__num_edges = len(edge_index)
+
+        arcs = np.array([(index[op], index[next_op]) for op, next_ops in precedence.items() \
+                            for next_op in next_ops], dtype=int).reshape(-1, 2)
+        res = IndexedGraph.from_edges(num, arcs).heads_and_tails(self.__durations)
+        if res is None:
+            raise JSPException('Cycle exists in coflow precedence.')
+        self.__heads, self.__tails = res
+        self.__jackson = None
+
+
+    @property
+    def heads(self) -> np.ndarray:
+        '''Longest processing time before each operation starts, i.e. the earliest start time in
+        coflow, same to `CoFlow.ete`.'''
+        return self.__heads
+
+    @property
+    def tails(self) -> np.ndarray:
+        '''Longest processing time after each operation completes in coflow.'''
+        return self.__tails
+
+    @property
+    def critical_path(self) -> float:
+        '''The longest critical path of all coflows.'''
+        if not self.__durations.size: return 0.0
+        return float((self.__heads+self.__durations+self.__tails).max())
+
+    @property
+    def edge_load(self) -> float:
+        '''The max load bound of all edges: min head + total duration + min tail.'''
+        if not self.__durations.size: return 0.0
+        min_heads = np.full(self.__num_edges, np.inf)
+        min_tails = np.full(self.__num_edges, np.inf)
+        np.minimum.at(min_heads, self.__edges, self.__heads)
+        np.minimum.at(min_tails, self.__edges, self.__tails)
+        loads = np.bincount(self.__edges, weights=self.__durations, minlength=self.__num_edges)
+        return float((min_heads+loads+min_tails).max())
+
+    @property
+    def jackson(self) -> float:
+        '''The max Jackson's preemptive schedule bound of all edges. Calculated on request.'''
+        if self.__jackson is None:
+            edge_ops = defaultdict(list)
+            for i, edge in enumerate(self.__edges.tolist()): edge_ops[edge].append(i)
+            self.__jackson = max((self.__preemptive_makespan(self.__heads[ops], self.__durations[ops], \
+                                    self.__tails[ops]) for ops in edge_ops.values()), default=0.0)
+        return self.__jackson
+
+
+    def value(self, jackson:bool=False) -> float:
+        '''The best lower bound.
+
+        Args:
+            jackson (bool, optional): Include the Jackson's preemptive schedule bound, which
+                dominates the edge load bound. Defaults to False.
+        '''
+        bounds = [self.critical_path, self.jackson if jackson else self.edge_load]
+        return max(bounds)
+
+
+    def gap(self, makespan:float, jackson:bool=False) -> float:
+        '''Relative gap of the makespan to the lower bound, e.g. 0.05 for 5%.'''
+        bound = self.value(jackson)
+        return (makespan-bound) / bound if bound else 0.0
+
+
+    @staticmethod
+    def __preemptive_makespan(heads:np.ndarray, durations:np.ndarray, tails:np.ndarray) -> float:
+        '''Makespan of Jackson's preemptive schedule on one machine: the available operation with
+        the longest tail is processed first, and preempted when another one with longer tail is
+        released.'''
+        order = np.argsort(heads, kind='stable')
+        heads, durations, tails = heads[order].tolist(), durations[order].tolist(), tails[order].tolist()
+        num = len(heads)
+        remaining = list(durations)
+        ready = [] # (-tail, i)
+        t, k, res = 0.0, 0, 0.0
+        while k < num or ready:
+            if not ready: t = max(t, heads[k])
+            while k < num and heads[k] <= t:
+                heapq.heappush(ready, (-tails[k], k))
+                k += 1
+            _, i = ready[0]
+            next_release = heads[k] if k < num else float('inf')
+            run = min(remaining[i], next_release-t)
+            t += run
+            remaining[i] -= run
+            if remaining[i] <= 0:
+                heapq.heappop(ready)
+                res = max(res, t+tails[i])
+        return res
@@ -0,0 +1,177 @@
+'''Array based representation of CoFlow Schedule solution: the flow chain, edge chain and start
+time of operations are stored in contiguous arrays indexed by the position of operation in
+`CFSProblem.ops`, rather than linked `TransOperationStep` instances.
+'''
+
+import numpy as np
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from model.variable import TransOperationStep
+
+
+class CompactSolution:
+
+    def __init__(self, problem: CFSProblem) -> None:
+        '''Initialize solution with flow chain only, i.e. no operation is dispatched yet.
+
+        Index -1 in `pre_flow`/`pre_edge` refers to the virtual flow/edge step, while in
+        `next_flow`/`next_edge` it means the end of chain.
+
+        Args:
+            problem (CFSProblem): Problem to solve.
+        '''
+        self.__problem = problem
+        ops = problem.ops
+        num = len(ops)
+
+        self.__durations = np.array([op.duration for op in ops], dtype=float)
+        flow_index = {flow: i for i, flow in enumerate(problem.flows)}
+        edge_index = {edge: i for i, edge in enumerate(problem.edges)}
+        self.__flows = np.array([flow_index[op.flow] for op in ops], dtype=int)
+        self.__edges = np.array([edge_index[op.edge] for op in ops], dtype=int)
+
+        # flow chain in the sequence of operations, same to `CFSSolution`
+        self.__pre_flow = np.full(num, -1, dtype=int)
+        self.__next_flow = np.full(num, -1, dtype=int)
+        tails = {}
+        for i, op in enumerate(ops):
+            pre = tails.get(op.flow, -1)
+            if pre>=0:
+                self.__pre_flow[i] = pre
+                self.__next_flow[pre] = i
+            tails[op.flow] = i
+
+        # edge chain to solve
+        self.__pre_edge = np.full(num, -1, dtype=int)
+        self.__next_edge = np.full(num, -1, dtype=int)
+        self.__dispatched = np.zeros(num, dtype=bool)
+
+        self.__start_times = np.zeros(num, dtype=float)
+        self.__sorted_ops = None # type: np.ndarray
+
+
+    @classmethod
+    def from_solution(cls, solution: CFSSolution, problem: CFSProblem=None):
+        '''Convert from the linked steps model.
+
+        Args:
+            solution (CFSSolution): Source solution.
+            problem (CFSProblem, optional): Problem of `solution`, with operations in the same
+                sequence to `solution.ops`. Defaults to None, i.e. created from `solution.ops`.
+        '''
+        problem = problem or CFSProblem(ops=[op.source for op in solution.ops])
+        compact = cls(problem)
+        index = {op: i for i, op in enumerate(solution.ops)}
+        for i, op in enumerate(solution.ops):
+            compact.__start_times[i] = op.start_time
+            if not op.pre_edge_op: continue
+            compact.__dispatched[i] = True
+            if isinstance(op.pre_edge_op, TransOperationStep):
+                pre = index[op.pre_edge_op]
+                compact.__pre_edge[i] = pre
+                compact.__next_edge[pre] = i
+
+        if solution.sorted_ops: compact.__sorted_ops = np.array([index[op] for op in solution.sorted_ops])
+        return compact
+
+
+    def to_solution(self) -> CFSSolution:
+        '''Convert to the linked steps model, e.g. for `CFSSolution.plot()`.'''
+        solution = CFSSolution(self.__problem)
+        ops = solution.ops
+        for i in np.flatnonzero(self.__dispatched):
+            op, pre = ops[i], self.__pre_edge[i]
+            op.pre_edge_op = ops[pre] if pre>=0 else solution.edge_head(op)
+
+        for op, start_time in zip(ops, self.__start_times.tolist()):
+            op.update_start_time(start_time)
+
+        # build the disjunctive graph if any operation is dispatched
+        if self.__dispatched.any(): solution.evaluate()
+        return solution
+
+
+    @property
+    def problem(self): return self.__problem
+
+    @property
+    def durations(self) -> np.ndarray: return self.__durations
+
+    @property
+    def flows(self) -> np.ndarray:
+        '''Index of the flow in `problem.flows` for each operation.'''
+        return self.__flows
+
+    @property
+    def edges(self) -> np.ndarray:
+        '''Index of the edge in `problem.edges` for each operation.'''
+        return self.__edges
+
+    @property
+    def pre_flow(self) -> np.ndarray: return self.__pre_flow
+
+    @property
+    def next_flow(self) -> np.ndarray: return self.__next_flow
+
+    @property
+    def pre_edge(self) -> np.ndarray: return self.__pre_edge
+
+    @property
+    def next_edge(self) -> np.ndarray: return self.__next_edge
+
+    @property
+    def dispatched(self) -> np.ndarray:
+        '''If operation is assigned to the edge chain.'''
+        return self.__dispatched
+
+    @property
+    def start_times(self) -> np.ndarray: return self.__start_times
+
+    @property
+    def end_times(self) -> np.ndarray: return self.__start_times + self.__durations
+
+    @property
+    def sorted_ops(self) -> np.ndarray:
+        '''Operation indexes in topological order. Only available after evaluation.'''
+        return self.__sorted_ops
+
+    @property
+    def makespan(self) -> float:
+        return float(np.max(self.end_times)) if self.__durations.size else 0.0
+
+
+    def evaluate(self) -> bool:
+        '''Update start time of dispatched operations by the flow chain and edge chain. Operations
+        are processed level by level in topological order, i.e. all operations whose predecessors
+        are evaluated are updated at once.
+
+        Returns:
+            bool: True if current solution is feasible.
+        '''
+        pre_flow, pre_edge = self.__pre_flow, self.__pre_edge
+        start_times, durations = self.__start_times, self.__durations
+        in_degrees = (pre_flow>=0).astype(int) + (pre_edge>=0)
+
+        levels = []
+        frontier = np.flatnonzero(in_degrees==0)
+        while frontier.size:
+            levels.append(frontier)
+
+            # start time of dispatched operations: max end time of previous operations
+            ops = frontier[self.__dispatched[frontier]]
+            if ops.size:
+                flow_ops, edge_ops = pre_flow[ops], pre_edge[ops]
+                flow_time = np.where(flow_ops>=0, start_times[flow_ops]+durations[flow_ops], 0.0)
+                edge_time = np.where(edge_ops>=0, start_times[edge_ops]+durations[edge_ops], 0.0)
+                start_times[ops] = np.maximum(flow_time, edge_time)
+
+            # release succeeding operations
+            next_ops = np.concatenate((self.__next_flow[frontier], self.__next_edge[frontier]))
+            next_ops = next_ops[next_ops>=0]
+            np.subtract.at(in_degrees, next_ops, 1)
+            frontier = np.unique(next_ops[in_degrees[next_ops]==0])
+
+        # the in-degree of all operations must be zero if the topological sorting is successful
+        sorted_ops = np.concatenate(levels) if levels else np.array([], dtype=int)
+        self.__sorted_ops = sorted_ops if sorted_ops.size==start_times.size else None
+        return self.__sorted_ops is not None
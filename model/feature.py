@@ -0,0 +1,65 @@
+'''Static features of operations, i.e. parameters constant during solving, e.g. the count of
+operations and the total processing time of the associated flow. They're calculated once per
+problem, shared by all solutions, and stored in arrays indexed by the position of operation in 
+`CFSProblem.ops`, i.e. also the position of operation step in `CFSSolution.ops`. The features 
+depending on the flow chain, e.g. the work remaining, follow the order of operations by default,
+or the given order, e.g. the topological order of coflow DAG.
+'''
+
+import numpy as np
+from collections import defaultdict
+
+
+class OperationFeatures:
+
+    def __init__(self, ops:list, order:list=None) -> None:
+        '''Calculate static features of all operations.
+
+        Args:
+            ops (list): Operations of the problem in flow sequence, i.e. `CFSProblem.ops`.
+            order (list, optional): Positions of operations in the sequence of flow chain, e.g.
+                `CFSProblem.topological_order`. Defaults to None, i.e. the sequence of `ops`.
+        '''
+        self.__index = {op: i for i, op in enumerate(ops)}
+
+        num = len(ops)
+        self.__durations = np.array([op.duration for op in ops], dtype=float)
+        self.__process_sequence = np.zeros(num, dtype=float)
+        self.__total_processing_time = np.zeros(num, dtype=float)
+        self.__work_remaining = np.zeros(num, dtype=float)
+
+        # flow chain in the sequence of operations, or the given order
+        flow_ops = defaultdict(list)
+        for i in (range(num) if order is None else order): flow_ops[ops[i].flow].append(i)
+
+        for pos in flow_ops.values():
+            pos = np.array(pos, dtype=int)
+            durations = self.__durations[pos]
+            self.__process_sequence[pos] = pos.size
+            self.__total_processing_time[pos] = durations.sum()
+            self.__work_remaining[pos] = np.cumsum(durations[::-1])[::-1] # suffix sum
+
+
+    def index(self, op) -> int:
+        '''Position of the operation step (TransOperationStep) in the feature arrays.'''
+        return self.__index[op.source]
+
+    @property
+    def durations(self) -> np.ndarray:
+        '''Processing Time: time required to complete an operation on the edge.'''
+        return self.__durations
+
+    @property
+    def process_sequence(self) -> np.ndarray:
+        '''Process Sequence: total count of operations to complete the flow.'''
+        return self.__process_sequence
+
+    @property
+    def total_processing_time(self) -> np.ndarray:
+        '''Total Processing Time: total time required to complete the flow.'''
+        return self.__total_processing_time
+
+    @property
+    def work_remaining(self) -> np.ndarray:
+        '''Total Work Remaining: time to complete current and the remaining operations in flow.'''
+        return self.__work_remaining
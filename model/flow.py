@@ -1,6 +1,6 @@
 import networkx as nx
 import random
-from collections import deque
+from collections import (defaultdict, deque)
 from model.topo import Topo
 from model.domain import (Flow, Node, Edge, TransOperation)
 
@@ -9,19 +9,93 @@ def get_ops(flowlist:list):
     '''Args: flowlist(list(CoFlow))
     '''
     operations = []
-    flow_ops = []
     count = 0
     for flow in flowlist:
-        edge_op_temp = {}
         for edge in flow.edges:
             op = TransOperation(count, flow, edge, edge.weight)
-            edge_op_temp[edge.id] = op
             count += 1
             operations.append(op)
-        for path in flow.paths:
-            path_op = [edge_op_temp[edge.id] for edge in path]
-            flow_ops.append(path_op)
-    return operations, flow_ops
+    return operations
+
+
+def get_precedence(ops:list) -> dict:
+    '''Precedence of operations in coflow DAG: an operation on edge (u, v) precedes operations 
+    on edges (v, w) of the same flow.
+
+    Args: ops(list(TransOperation))
+
+    Returns:
+        dict: {op: [succeeding ops]}
+    '''
+    out_ops = defaultdict(list) # (flow, node id) -> ops on the out edges of node
+    for op in ops:
+        out_ops[(op.flow, op.edge.pred_node.id)].append(op)
+    return {op: out_ops.get((op.flow, op.edge.succ_node.id), []) for op in ops}
+
+
+def get_path_precedence(ops:list, path_ops:list) -> dict:
+    '''Precedence of operations collapsed from the given paths: the unique arcs between 
+    consecutive operations, since sibling paths share most prefixes and suffixes.
+
+    Args:
+        ops (list(TransOperation)): Operations.
+        path_ops (list): Paths of operations, i.e. [[op0, op1, ...], ...].
+
+    Returns:
+        dict: {op: [succeeding ops]}, where the last operations of paths have no succeeding ops.
+    '''
+    precedence = {op: [] for op in ops}
+    arcs = set()
+    for path in path_ops:
+        for op, next_op in zip(path, path[1:]):
+            if (op, next_op) in arcs: continue
+            arcs.add((op, next_op))
+            precedence[op].append(next_op)
+    return precedence
+
+
+def get_paths(ops:list, precedence:dict):
+    '''Enumerate paths of operations from the source to sink in coflow DAG.
+
+    NOTE: the count of paths grows exponentially with the width of DAG, so iterate it on request.
+
+    Args:
+        ops (list(TransOperation)): Operations.
+        precedence (dict): Precedence of operations, see `get_precedence()`.
+    '''
+    succeeding_ops = {next_op for next_ops in precedence.values() for next_op in next_ops}
+    for op in ops:
+        if op in succeeding_ops: continue # not a source operation
+
+        # dfs
+        stack = [[op]]
+        while stack:
+            path = stack.pop()
+            next_ops = precedence[path[-1]]
+            if not next_ops: 
+                yield path
+            else:
+                stack.extend(path+[next_op] for next_op in reversed(next_ops))
+
+
+def get_components(ops:list) -> list:
+    '''Split operations into independent groups: flows sharing edges with each other, even 
+    indirectly, are in the same group, i.e. connected component of the flow-edge conflict graph.
+
+    Args: ops(list(TransOperation))
+
+    Returns:
+        list: [[ops of group 1], [ops of group 2], ...], in the original sequence of operations.
+    '''
+    graph = nx.Graph()
+    for op in ops: graph.add_edge(op.flow, op.edge)
+    components = {} # flow -> index of component
+    for i, nodes in enumerate(nx.connected_components(graph)):
+        for node in nodes: components[node] = i
+
+    groups = defaultdict(list)
+    for op in ops: groups[components[op.flow]].append(op)
+    return [groups[i] for i in sorted(groups)]
 
 
 class CoFlow(Flow):
@@ -32,7 +106,7 @@ class CoFlow(Flow):
         self.__topo = topo
         self.__flowG = flow
         self.__edges = [topo.get_edge(edge) for edge in flow.edges]
-        self.__paths = self.__get_paths()
+        self.__paths = None # enumerated on request
         self.etv, self.ltv, self.ete, self.lte, self.cp = self.__get_critical_path()
     
     @property
@@ -42,7 +116,11 @@ class CoFlow(Flow):
     def graph(self): return self.__flowG
     
     @property
-    def paths(self): return self.__paths
+    def paths(self): 
+        '''All edge paths from source nodes to the sink node. Enumerated on request since the 
+        count of paths grows exponentially with the width of DAG.'''
+        if self.__paths is None: self.__paths = self.__get_paths()
+        return self.__paths
 
     def __get_paths(self):
         graph = self.__flowG
@@ -78,13 +156,14 @@ class CoFlow(Flow):
             
         # 计算事件的最晚开始时间
         vertex_latest_start = {}
+        length = max(vertex_earliest_start.values()) # 关键路径长度
         for node in topoSeq[::-1]:
-            # 如果是终点，事件最晚开始时间等于最早开始时间
+            # 如果是终点，事件最晚开始时间等于关键路径长度
             if graph.out_degree(node) == 0:
-                vertex_latest_start[node] = vertex_earliest_start[node]
+                vertex_latest_start[node] = length
             else:
-                # 最晚开始时间为后继节点的最早开始时间减去当前节点的持续时间
-                vertex_latest_start[node] = min([vertex_earliest_start[succ] - graph[node][succ]['weight'] for succ in graph.successors(node)])
+                # 最晚开始时间为后继节点的最晚开始时间减去当前节点的持续时间
+                vertex_latest_start[node] = min([vertex_latest_start[succ] - graph[node][succ]['weight'] for succ in graph.successors(node)])
         
         # 计算活动的最早开始时间和最晚开始时间
         edge_earliest_start = {}
@@ -2,13 +2,17 @@
 '''
 
 import os, json, random
+import numpy as np
 import networkx as nx
 from matplotlib import pyplot as plt
 from matplotlib.animation import FuncAnimation
 from model.domain import (Flow, Edge, TransOperation, Cloneable)
 from model.topo import Topo
-from model.flow import CoFlow, get_ops
+from model.flow import CoFlow, get_ops, get_precedence, get_path_precedence, get_paths, get_components
+from model.feature import OperationFeatures
+from model.bound import LowerBounds
 from common.exception import JSPException
+from common.graph import IndexedGraph
 from jsp_fwk.model.domain import (Job, Machine, Operation)
 
 class CFSProblem(Cloneable):
@@ -46,13 +50,17 @@ class CFSProblem(Cloneable):
         self.__ops = []   # type: list[TransOperation]
         if ops: self.__ops = ops
 
+        # operations in the given paths
+        elif path_ops:
+            self.__ops = sorted({op for path in path_ops for op in path}, key=lambda op: op.id)
+
         # random operations
         elif num_flows and num_edges:
             self.__ops = self.__generate_by_random(num_flows, num_edges)
         
         # from benchmark
         elif benchmark:
-            self.__ops, self.__path_ops = self.__load_from_benchmark(name=benchmark)
+            self.__ops = self.__load_from_benchmark(name=benchmark)
             if not name: self.name = benchmark
         
         # from user input file
@@ -62,9 +70,16 @@ class CFSProblem(Cloneable):
         # collect jobs and machines
         self.__flows, self.__edges = self.__collect_flows_and_edges()
 
-        # handle coflow schedule
-        self.__path_ops = []
-        if path_ops: self.__path_ops = path_ops
+        # handle coflow schedule: precedence of operations in coflow DAG, and the paths 
+        # enumerated on request
+        self.__precedence = None
+        self.__path_ops = path_ops or None
+
+        # static features and lower bounds: calculated when accessed
+        self.__features = None # type: OperationFeatures
+        self.__topological_order = None
+        self.__topological_features = None # type: OperationFeatures
+        self.__bounds = None # type: LowerBounds
     
     @property
     def flows(self): return self.__flows
@@ -76,14 +91,80 @@ class CFSProblem(Cloneable):
     def ops(self): return self.__ops
 
     @property
-    def path_ops(self): return self.__path_ops
+    def precedence(self): 
+        '''Precedence of operations in coflow DAG: {op: [succeeding ops]}. Collapsed from the unique
+        arcs of `path_ops` if the paths are given explicitly.'''
+        if self.__precedence is None:
+            self.__precedence = get_path_precedence(self.__ops, self.__path_ops) if self.__path_ops \
+                                    else get_precedence(self.__ops)
+        return self.__precedence
+
+    @property
+    def path_ops(self): 
+        '''Paths of operations from the source to sink of each coflow. Enumerated on request, 
+        since the count grows exponentially with the width of DAG; use `precedence` instead if 
+        possible.'''
+        if self.__path_ops is None: self.__path_ops = list(get_paths(self.__ops, self.precedence))
+        return self.__path_ops
 
     @property
     def optimum(self): return self.__optimum
 
+    @property
+    def features(self) -> OperationFeatures:
+        '''Static features of operations shared by all solutions.'''
+        if self.__features is None: self.__features = OperationFeatures(self.__ops)
+        return self.__features
+
+    @property
+    def topological_order(self) -> list:
+        '''Positions of operations sorted by the head in coflow DAG, i.e. a topological order 
+        where the independent operations are interleaved by the earliest start time.'''
+        if self.__topological_order is None:
+            index = {op: i for i, op in enumerate(self.__ops)}
+            arcs = [(index[op], index[next_op]) for op, next_ops in self.precedence.items() \
+                        for next_op in next_ops]
+            graph = IndexedGraph.from_edges(len(self.__ops), arcs)
+            res = graph.heads_and_tails([op.duration for op in self.__ops])
+            if res is None: raise JSPException('Cycle exists in coflow DAG.')
+            positions = [graph.position(i) for i in range(len(self.__ops))]
+            self.__topological_order = np.lexsort((positions, res[0])).tolist()
+        return self.__topological_order
+
+    @property
+    def topological_features(self) -> OperationFeatures:
+        '''Static features of operations with flow chain in `topological_order`.'''
+        if self.__topological_features is None: 
+            self.__topological_features = OperationFeatures(self.__ops, self.topological_order)
+        return self.__topological_features
+
+    @property
+    def bounds(self) -> LowerBounds:
+        '''Lower bounds of the makespan, e.g. `bounds.value()`.'''
+        if self.__bounds is None: self.__bounds = LowerBounds(self.__ops, self.precedence)
+        return self.__bounds
+
     @property
     def solution(self): return self.__solution
 
+    def decompose(self) -> list:
+        '''Split the problem into independent sub-problems, i.e. flows in different sub-problems 
+        share no edge with each other, even indirectly.
+
+        Returns:
+            list: [CFSProblem], sharing operations and the paths, if given or enumerated already, 
+                with current problem.
+        '''
+        groups = get_components(self.__ops)
+        if len(groups)==1: return [self]
+
+        def create_problem(i:int, ops:list):
+            # paths of the flows in this group, since each path belongs to one flow
+            flows = {op.flow for op in ops}
+            path_ops = [path for path in self.__path_ops if path[0].flow in flows] if self.__path_ops else None
+            return CFSProblem(path_ops=path_ops, ops=ops, name=f'{self.name}-{i}')
+        return [create_problem(i, ops) for i, ops in enumerate(groups)]
+
     def register_solution_callback(self, callback):
         '''Register solution callback called when a better solution is found.'''
         self.__solution_callback = callback
@@ -200,8 +281,7 @@ class CFSProblem(Cloneable):
             instance_detail = json.load(f)
         
         coflows = [CoFlow(f["flowid"], topo, nx.DiGraph(f["edges"])) for f in instance_detail["flows"]]
-        ops, path_ops = get_ops(coflows)
-        return ops, path_ops
+        return get_ops(coflows)
 
 
     def __generate_by_random(self, num_jobs:int, num_machines:int) -> list:
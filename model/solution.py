@@ -2,6 +2,8 @@
 assigned in each edge(machine), and the deduced start time of each operation accordingly.
 '''
 
+import heapq
+import numpy as np
 from collections import defaultdict
 from matplotlib.container import BarContainer
 from model.problem import CFSProblem
@@ -9,34 +11,51 @@ from model.variable import (FlowStep, EdgeStep, TransOperationStep)
 from model.domain import (TransOperation, Cloneable)
 from jsp_fwk.model.problem import JSProblem
 from jsp_fwk.model.solution import JSSolution
-from common.graph import DirectedGraph
+from common.graph import IndexedGraph
 
 
 class CFSSolution(Cloneable):
 
-    def __init__(self, problem: CFSProblem) -> None:
+    def __init__(self, problem: CFSProblem, topological:bool=False) -> None:
         '''Initialize solution by copying all operations from `problem`.
 
         Args:
             problem (JSProblem): Problem to solve.
+            topological (bool, optional): Link the operations of each flow in a topological 
+                order of coflow DAG, so that the flow chain implies the precedence. Defaults to 
+                False, i.e. in the order of `problem.ops`.
         '''
         self.__ops = [TransOperationStep(op) for op in problem.ops]
 
-        if problem.path_ops:
-            ops_map = dict(zip(problem.ops, self.__ops))
-            self.__path_ops = []
-            for path in problem.path_ops:
-                self.__path_ops.append([ops_map[op] for op in path])
+        # index: source operation -> operation step
+        self.__ops_map = dict(zip(problem.ops, self.__ops))
+
+        # precedence and paths in coflow DAG: mapped from problem when accessed
+        self.__problem = problem
+        self.__precedence = None
+        self.__path_ops = None
+        self.__topological = topological
         
         self.__edges = problem.edges
 
         # group operation steps with job and machine and initialize job chain
         self.__flow_ops = defaultdict(list)
         self.__edge_ops = defaultdict(list)
+        self.__flow_heads = {} # index: flow -> flow step
+        self.__edge_heads = {} # index: edge -> edge step
         self.__create_flow_chain()
 
-        # operations in topological order: available for disjunctive graph model only
-        self.__sorted_ops = None # type: list[TransOperationStep]
+        # persistent disjunctive graph over the index of operations, created on first update,
+        # which maintains the topological order: available for disjunctive graph model only
+        self.__graph = None      # type: IndexedGraph
+        self.__index = None      # operation step -> node index
+        self.__edge_next = None  # index of the next operation in edge chain, i.e. graph edge
+        self.__durations = None  # duration of operations in array
+        self.__acyclic = False   # valid topological order or not
+
+        # changes after the outermost checkpoint: (op, preceding op in edge chain before move) 
+        # or (op, start time before update)
+        self.__journal = None    # type: list
 
 
     @property
@@ -47,7 +66,18 @@ class CFSSolution(Cloneable):
     
     @property
     def path_ops(self) -> list:
+        '''Paths of operation steps in coflow DAG. Enumerated on request, see `CFSProblem.path_ops`.'''
+        if self.__path_ops is None:
+            self.__path_ops = [[self.__ops_map[op] for op in path] for path in self.__problem.path_ops]
         return self.__path_ops
+    
+    @property
+    def precedence(self) -> dict:
+        '''Precedence of operation steps in coflow DAG: {op: [succeeding ops]}.'''
+        if self.__precedence is None:
+            self.__precedence = {self.__ops_map[op]: [self.__ops_map[next_op] for next_op in next_ops] \
+                                    for op, next_ops in self.__problem.precedence.items()}
+        return self.__precedence
 
     @property
     def flow_ops(self): 
@@ -62,7 +92,13 @@ class CFSSolution(Cloneable):
     @property
     def sorted_ops(self): 
         '''Topological order of the operation steps. Only available for disjunctive graph model.'''
-        return self.__sorted_ops
+        return [self.__ops[i] for i in self.__graph.sort().tolist()] if self.__acyclic else None
+
+    @property
+    def features(self):
+        '''Static features of operation steps, e.g. the total processing time of flow, which
+        follow the topological flow chain if specified.'''
+        return self.__problem.topological_features if self.__topological else self.__problem.features
 
     @property
     def makespan(self) -> float:
@@ -74,26 +110,17 @@ class CFSSolution(Cloneable):
 
     def find(self, source_op:TransOperation):
         '''Find the associated step with source operation.'''
-        for op in self.__ops:
-            if op.source==source_op:
-                return op
-        return None
+        return self.__ops_map.get(source_op, None)
 
 
     def flow_head(self, op:TransOperationStep):
         '''The first step in flow chain of specified `op`, i.e. the virtual flow step.'''
-        for flow_step in self.__flow_ops:
-            if flow_step.source==op.source.flow:
-                return flow_step
-        return None
+        return self.__flow_heads.get(op.source.flow, None)
     
 
     def edge_head(self, op:TransOperationStep):
         '''The first step in edge chain of specified `op`, i.e. the virtual edge step.'''
-        for edge_step in self.__edge_ops:
-            if edge_step.source==op.source.edge:
-                return edge_step
-        return None
+        return self.__edge_heads.get(op.source.edge, None)
 
 
     @property
@@ -111,23 +138,15 @@ class CFSSolution(Cloneable):
     def copy(self):
         '''Hard copy of current solution. Override `Cloneable.copy()`.'''
         # copy step instances and flow chain
-        ops = [op.source for op in self.__ops]
-        solution = CFSSolution(problem=CFSProblem(ops=ops))
+        solution = CFSSolution(problem=self.__problem, topological=self.__topological)
 
         # copy edge chain
-        def map_source_to_step(solution):
-            '''map source instance to step instance'''
-            step_map = {}
-            for edge_step, ops in solution.edge_ops.items():
-                step_map[edge_step.source] = edge_step
-                for op_step in ops:
-                    step_map[op_step.source] = op_step
-            return step_map
-        step_map = map_source_to_step(solution)
-
         for op, new_op in zip(self.__ops, solution.ops):
             if not op.pre_edge_op: continue
-            new_op.pre_edge_op = step_map[op.pre_edge_op.source]
+            if isinstance(op.pre_edge_op, TransOperationStep):
+                new_op.pre_edge_op = solution.find(op.pre_edge_op.source)
+            else:
+                new_op.pre_edge_op = solution.edge_head(new_op)
         
         # update
         solution.evaluate()
@@ -141,21 +160,148 @@ class CFSSolution(Cloneable):
         return max(op.pre_flow_op.end_time, edge_op.end_time)
 
 
-    def dispatch(self, op:TransOperationStep):
-        '''Dispatch the operation step to the associated edge.'''
+    def dispatch(self, op:TransOperationStep) -> bool:
+        '''Dispatch the operation step to the associated edge, and update the topological order 
+        and start time of the affected operations incrementally.
+
+        Returns:
+            bool: True if current solution is still feasible.
+        '''
         pre_edge_op = self.edge_head(op).tailed_edge_op
         op.pre_edge_op = pre_edge_op
-        self.evaluate(op=op) # update start time accordingly
+
+        # build the disjunctive graph for the first time, then insert the new edge chain only
+        if not self.__acyclic: 
+            self.__acyclic = self.__update_graph()
+        elif isinstance(pre_edge_op, TransOperationStep):
+            self.__acyclic = self.__update_edges([pre_edge_op])
+        
+        if not self.__acyclic:
+            return False
+
+        self.__propagate_start_time(op)
+        return True
+
+
+    def move(self, op:TransOperationStep, pre_edge_op:EdgeStep) -> bool:
+        '''Move the operation step right after `pre_edge_op` in the edge chain, e.g. swap two 
+        adjacent operations, and update the topological order and start time of the affected 
+        operations incrementally. The move is undone if it creates a cycle.
+
+        NOTE: the edge chain is assumed to be completed, i.e. all operations are dispatched.
+
+        Args:
+            op (TransOperationStep): The operation step to move.
+            pre_edge_op (EdgeStep): The operation step on same edge, or the edge head, i.e. 
+                `edge_head(op)`, to move `op` to the front.
+
+        Returns:
+            bool: False if the move creates a cycle, and the solution is kept unchanged.
+        '''
+        old_pre_edge_op = op.pre_edge_op
+        if pre_edge_op is op or pre_edge_op is old_pre_edge_op: return True
+        if not self.__acyclic: 
+            self.__acyclic = self.__update_graph()
+            if not self.__acyclic: return False
+
+        # relink and synchronize the changed edge chain edges only
+        affected = [step for step in (old_pre_edge_op, pre_edge_op, op) \
+                        if isinstance(step, TransOperationStep)]
+        edge_next = [self.__edge_next[self.__index[step]] for step in affected]
+        old_next_edge_op = self.__relink(op, pre_edge_op)
+        mark = self.__graph.checkpoint()
+        if not self.__update_edges(affected):
+            self.__graph.rollback(mark)
+            for step, j in zip(affected, edge_next): self.__edge_next[self.__index[step]] = j
+            self.__relink(op, old_pre_edge_op)
+            return False
+        self.__graph.commit(mark)
+        if self.__journal is not None: self.__journal.append((op, old_pre_edge_op))
+
+        # the operations whose preceding operation in edge chain is changed
+        self.__propagate_start_time(*(step for step in (op, old_next_edge_op, op.next_edge_op) if step))
+        return True
+
+
+    def checkpoint(self) -> int:
+        '''Start recording the moves by `move()` and the changed start times, so that they can be
+        undone by `rollback()` rather than exploring on a copy of solution. Checkpoints can be 
+        nested.
+
+        Returns:
+            int: Mark of the checkpoint.
+        '''
+        if self.__journal is None: self.__journal = []
+        return len(self.__journal)
+
+
+    def rollback(self, mark:int):
+        '''Undo the moves and start times after checkpoint `mark` in the reversed order. 
+        Recording stops if it is the outermost checkpoint.'''
+        journal = self.__journal
+        while len(journal) > mark:
+            op, value = journal.pop()
+            if isinstance(value, EdgeStep): # move back, which is always acyclic
+                affected = [step for step in (op.pre_edge_op, value, op) \
+                                if isinstance(step, TransOperationStep)]
+                self.__relink(op, value)
+                self.__update_edges(affected)
+            else:
+                op.update_start_time(value)
+        if mark==0: self.__journal = None
+
+
+    def commit(self, mark:int):
+        '''Keep the changes after checkpoint `mark`. Recording stops if it is the outermost 
+        checkpoint.'''
+        if mark==0: self.__journal = None
+
+
+    def snapshot(self) -> tuple:
+        '''Structural snapshot of current solution, i.e. the edge chain and start times in 
+        arrays, which is much cheaper than `copy()` to keep the best solution in a search.
+
+        Returns:
+            tuple: (index of the preceding operation in edge chain, start times), where the index 
+                is -1 for the first operation in edge chain, and -2 if not dispatched.
+        '''
+        index = {op: i for i, op in enumerate(self.__ops)} if self.__index is None else self.__index
+        pre_ops = [index.get(op.pre_edge_op, -1) if op.pre_edge_op else -2 for op in self.__ops]
+        return np.array(pre_ops, dtype=np.int64), np.array([op.start_time for op in self.__ops])
+
+
+    def restore(self, snapshot:tuple) -> bool:
+        '''Restore the edge chain and start times from `snapshot()`, where the disjunctive graph 
+        is synchronized with the changed edge chain edges only. The checkpoints before are 
+        discarded.
+
+        Returns:
+            bool: True if the restored solution is feasible.
+        '''
+        pre_ops, start_times = snapshot
+        pre_ops = pre_ops.tolist()
+        for op, i in zip(self.__ops, pre_ops):
+            op.pre_edge_op = self.__ops[i] if i>=0 else (self.edge_head(op) if i==-1 else None)
+        
+        # detach the tails of edge chain
+        linked = set(pre_ops)
+        for i, op in enumerate(self.__ops):
+            if i not in linked: op.next_edge_op = None
+        linked = {op.source.edge for op, i in zip(self.__ops, pre_ops) if i==-1}
+        for edge_step in self.__edge_ops:
+            if edge_step.source not in linked: edge_step.next_edge_op = None
+            edge_step.reset_tail()
+        
+        for op, start_time in zip(self.__ops, start_times.tolist()): op.update_start_time(start_time)
+        self.__journal = None
+        self.__acyclic = self.__update_graph()
+        return self.__acyclic
 
 
     def is_feasible(self) -> bool:
         '''If current solution is valid or not. 
         Note to call this method after evaluating the solution if based on disjunctive graph model.
         '''
-        # check topological order if disjunctive graph model, 
-        # otherwise check the start time further directly
-        if self.__sorted_ops: return True
-
         # validate job chain        
         # for flow, ops in self.__flow_ops.items():
         #     ops.sort(key=lambda op: op.id) # sort in flow sequence, i.e. default id order
@@ -166,14 +312,14 @@ class CFSSolution(Cloneable):
         #             return False
         #         ref = op.end_time
 
-        # validate flow chain
-        for path in self.__path_ops:
-            ref = 0
-            for op in path:
-                if op.end_time <= ref:
-                    print('debug: validate job chain', op, op.end_time, ref)
-                    return False
-                ref = op.end_time
+        # validate flow chain: precedence in coflow DAG
+        for op, next_ops in self.precedence.items():
+            for next_op in next_ops:
+                if next_op.start_time < op.end_time: return False
+
+        # edge chain is valid by the topological order if disjunctive graph model, 
+        # otherwise check the start time further directly
+        if self.__acyclic: return True
         
         # validate edge chain        
         for edge, ops in self.__edge_ops.items():
@@ -202,21 +348,36 @@ class CFSSolution(Cloneable):
             bool: True if current solution is feasible.
         '''
         # update topological order due to the changed machine chain
-        self.__update_graph()
-        if not self.__sorted_ops: 
+        self.__acyclic = self.__update_graph()
+        if not self.__acyclic: 
             print('debug: not sorted_ops')
             return False
 
-        # the position of target process
-        pos = 0 if op is None else self.__sorted_ops.index(op)
-        
-        # update process by the topological order
-        for op in self.__sorted_ops[pos:]:
-            op.update_start_time()
+        # update process from the position of target process in topological order
+        order = self.__graph.sort()
+        position = 0 if op is None else self.__graph.position(self.__index[op])
+        if self.__journal is None:
+            for i in order[position:].tolist(): self.__ops[i].update_start_time()
+        else:
+            for i in order[position:].tolist(): self.__update_start_time(self.__ops[i])
         
         return True
 
 
+    def heads_and_tails(self) -> tuple:
+        '''Heads and tails of operation steps in the disjunctive graph, see 
+        `IndexedGraph.heads_and_tails()`, where head + duration + tail is the length of the 
+        longest path through the operation.
+
+        NOTE: this method is only available for disjunctive graph model.
+
+        Returns:
+            tuple: (heads, tails) in array, in the order of `ops`; or None if not acyclic.
+        '''
+        if not self.__acyclic: return None
+        return self.__graph.heads_and_tails(self.__durations)
+
+
     def plot(self, axes:tuple):
         '''Plot Gantt chart.
 
@@ -253,17 +414,21 @@ class CFSSolution(Cloneable):
 
 
     def __create_flow_chain(self):
-        '''Initialize flow chain based on the sequence of operations.'''
+        '''Initialize flow chain based on the sequence of operations, or the topological order 
+        of coflow DAG if specified.'''
         # group operations with job and machine, respectively
         flow_ops = defaultdict(list)
         edge_ops = defaultdict(list)
-        for op in self.__ops:
+        ops = [self.__ops[i] for i in self.__problem.topological_order] if self.__topological else self.__ops
+        for op in ops:
             flow_ops[op.source.flow].append(op)
             edge_ops[op.source.edge].append(op)
         
         # convert the key form Job/Machine to JobStep/MachineStep
         self.__flow_ops = { FlowStep(flow) : ops for flow, ops in flow_ops.items() }
         self.__edge_ops = { EdgeStep(edge) : ops for edge, ops in edge_ops.items() }
+        self.__flow_heads = { flow_step.source: flow_step for flow_step in self.__flow_ops }
+        self.__edge_heads = { edge_step.source: edge_step for edge_step in self.__edge_ops }
         
         # create chain for operations of each job
         def create_chain(flow_step:FlowStep, ops:list):
@@ -275,28 +440,111 @@ class CFSSolution(Cloneable):
         for flow, ops in self.__flow_ops.items(): create_chain(flow, ops)    
     
 
-    def __update_graph(self):
-        '''Update the associated directed graph and the topological order accordingly.'''
-        # add the dummy source and sink node
-        source, sink = TransOperationStep(), TransOperationStep()
+    def __update_graph(self) -> bool:
+        '''Update the associated directed graph and the topological order accordingly. The graph 
+        is created once with the flow chain, and then only the changed edge chain is synchronized 
+        by deleting and inserting edges in place.
 
-        # identical directed graph
-        graph = DirectedGraph()
-        for op in self.__ops:
-            # flow chain edge
-            if not isinstance(op.pre_flow_op, TransOperationStep): # first real operation step
-                graph.add_edge(source, op)
-            
-            if op.next_flow_op:
-                graph.add_edge(op, op.next_flow_op)
+        Returns:
+            bool: False if cycle exists.
+        '''
+        if self.__graph is None: self.__create_graph()
+        return self.__update_edges(self.__ops)
+
+
+    def __create_graph(self):
+        '''Create the directed graph with the flow chain edges.'''
+        self.__index = {op: i for i, op in enumerate(self.__ops)}
+        self.__graph = IndexedGraph(len(self.__ops))
+        self.__edge_next = [-1] * len(self.__ops)
+        self.__durations = np.array([op.source.duration for op in self.__ops], dtype=float)
+        for i, op in enumerate(self.__ops):
+            if op.next_flow_op: self.__graph.add_edge(i, self.__index[op.next_flow_op])
+
+
+    def __update_edges(self, ops:list) -> bool:
+        '''Synchronize the edge chain edges starting from `ops` to the graph. All outdated edges 
+        are deleted before inserting new ones, so no cycle is reported by mistake.
+
+        Returns:
+            bool: False if cycle exists, where the edges creating cycle are not inserted.
+        '''
+        graph, edge_next = self.__graph, self.__edge_next
+        inserted = []
+        for op in ops:
+            # edge chain edge, except the duplicated one of flow chain
+            i, next_op = self.__index[op], op.next_edge_op
+            j = self.__index[next_op] if next_op and next_op!=op.next_flow_op else -1
+            if j==edge_next[i]: continue
+            if edge_next[i]>=0: graph.remove_edge(i, edge_next[i])
+            edge_next[i] = -1
+            if j>=0: inserted.append((i, j))
+
+        res = True
+        for i, j in inserted:
+            if graph.add_edge(i, j): 
+                edge_next[i] = j
             else:
-                graph.add_edge(op, sink)
-            
-            # edge chain edge
-            if op.next_edge_op and op.next_edge_op!=op.next_flow_op:
-                graph.add_edge(op, op.next_edge_op)
-
-        # topological order:
-        # except the dummy source and sink nodes
-        ops = graph.sort()
-        self.__sorted_ops = ops[1:-1] if ops else None
\ No newline at end of file
+                res = False
+        return res and (graph.is_sorted or graph.sort() is not None)
+
+
+    def __relink(self, op:TransOperationStep, pre_edge_op:EdgeStep) -> TransOperationStep:
+        '''Unlink `op` from the edge chain and link it again right after `pre_edge_op`, where 
+        the cached tail of edge chain is reset.
+
+        Returns:
+            TransOperationStep: The original next operation of `op` in edge chain.
+        '''
+        old_pre_edge_op, old_next_edge_op = op.pre_edge_op, op.next_edge_op
+        if old_next_edge_op:
+            old_next_edge_op.pre_edge_op = old_pre_edge_op
+        else:
+            old_pre_edge_op.next_edge_op = None
+        
+        next_edge_op = pre_edge_op.next_edge_op
+        op.pre_edge_op = pre_edge_op
+        if next_edge_op:
+            next_edge_op.pre_edge_op = op
+        else:
+            op.next_edge_op = None
+        self.edge_head(op).reset_tail()
+        return old_next_edge_op
+    
+
+    def __propagate_start_time(self, *ops):
+        '''Update start time of `ops` and the succeeding operations in topological order, while
+        stop at the operations whose start time is not changed.'''
+        position = lambda step: self.__graph.position(self.__index[step])
+        ops = set(ops)
+        queue = [(position(op), op) for op in ops]
+        heapq.heapify(queue)
+        queued = set(ops)
+        while queue:
+            _, step = heapq.heappop(queue)
+            if not self.__update_start_time(step) and step not in ops: continue
+
+            for next_step in self.__successors(step):
+                if next_step in queued: continue
+                queued.add(next_step)
+                heapq.heappush(queue, (position(next_step), next_step))
+
+
+    def __update_start_time(self, op:TransOperationStep) -> bool:
+        '''Update start time of `op` by the preceding operations, and record the original one if 
+        changed after a checkpoint.
+
+        Returns:
+            bool: True if the start time is changed.
+        '''
+        start_time = op.start_time
+        op.update_start_time()
+        if op.start_time==start_time: return False
+        if self.__journal is not None: self.__journal.append((op, start_time))
+        return True
+
+
+    @staticmethod
+    def __successors(op:TransOperationStep) -> list:
+        '''Succeeding operation steps in both flow chain and edge chain.'''
+        return [step for step in (op.next_flow_op, op.next_edge_op) if step]
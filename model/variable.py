@@ -64,6 +64,10 @@ class EdgeStep(Step):
         # edge chain to solve
         self.__pre_edge_op = None    # type: EdgeStep
         self.__next_edge_op = None   # type: TransOperationStep
+
+        # cached tail of edge chain and the total duration of operations before it
+        self.__tailed_edge_op = self # type: EdgeStep
+        self.__service_time = 0.0
     
     @property
     def pre_edge_op(self): return self.__pre_edge_op
@@ -75,26 +79,53 @@ class EdgeStep(Step):
     def pre_edge_op(self, op):
         self.__pre_edge_op = op
         if hasattr(op, 'next_edge_op'): op.__next_edge_op = self
+
+    @next_edge_op.setter
+    def next_edge_op(self, op):
+        '''Set the next step only, e.g. None to detach the tail of edge chain. Linking two steps 
+        is done by setting `pre_edge_op`, which updates `next_edge_op` accordingly.'''
+        self.__next_edge_op = op
     
     @property
     def tailed_edge_op(self):
         '''The last step in current edge chain.'''
-        step = self
-        while True:
-            if step.__next_edge_op is None: return step
-            step = step.__next_edge_op
+        self.__move_tail()
+        return self.__tailed_edge_op
+    
+    @property
+    def service_time(self) -> float:
+        '''Total processing time of the operations in current edge chain.'''
+        self.__move_tail()
+        return self.__service_time
     
     @property
     def utilization(self):
         '''Utilization of current edge: service_time / (service_time + free_time).'''
-        service_time, total_time = 0, 0
-        op = self.__next_edge_op
-        while op:
-            service_time += op.source.duration
-            total_time = op.end_time
-            op = op.__next_edge_op
-        
-        return service_time/total_time if total_time else 1.0
+        tail = self.tailed_edge_op
+        if tail is self: return 1.0
+        total_time = tail.end_time
+        return self.__service_time/total_time if total_time else 1.0
+    
+
+    def reset_tail(self):
+        '''Reset the cached tail of edge chain, which is collected again from this step when 
+        accessed. Call it once the operations in the chain are reordered or unlinked.'''
+        self.__tailed_edge_op = self
+        self.__service_time = 0.0
+
+
+    def __move_tail(self):
+        '''Move the cached tail forward to the end of edge chain, so it's constant time to read 
+        when operations are appended one by one.
+
+        NOTE: the edge chain is assumed to be extended only, i.e. the cached tail and operations 
+        before it are never unlinked; otherwise, call `reset_tail()` first.
+        '''
+        step = self.__tailed_edge_op
+        while step.__next_edge_op:
+            step = step.__next_edge_op
+            self.__service_time += step.source.duration
+        self.__tailed_edge_op = step
 
 
 class TransOperationStep(FlowStep, EdgeStep):
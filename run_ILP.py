@@ -34,7 +34,7 @@ if __name__=='__main__':
             coflows = []
             for i, flow in enumerate(flows):
                 coflows.append(CoFlow(i, topo, flow))
-            ops, path_ops = get_ops(coflows)
+            ops = get_ops(coflows)
             # ----------------------------------------
             # save simulation instance details
             # ----------------------------------------
@@ -49,10 +49,6 @@ if __name__=='__main__':
                                     "flow": op.flow.id, 
                                     "edge": op.edge.id, 
                                     "duration": op.duration} for op in ops]
-            instance_detail["path_ops"] = [[{"opid": op.id, 
-                                            "flow": op.flow.id,
-                                            "edge": op.edge.id, 
-                                            "duration": op.duration} for op in path] for path in path_ops]
             
             with open(instance_path, 'w') as f:
                 json.dump(instance_detail, f, indent=4)
@@ -60,7 +56,7 @@ if __name__=='__main__':
             # ----------------------------------------
             # solve cfs problem
             # ----------------------------------------
-            problem = CFSProblem(path_ops=path_ops, ops=ops)
+            problem = CFSProblem(ops=ops)
             solverlog_path = os.path.join(benchmark_path, f'solverlogs/{instance_file}')
             s = PuLPSolver(solver_name='CPLEX', max_time=3600, log_path=solverlog_path)
             s.solve(problem=problem, interval=2000, callback=print_intermediate_solution)
@@ -74,7 +70,13 @@ if __name__=='__main__':
                 if s.status:
                     print(f'Problem: {len(problem.flows)} flows, {len(problem.edges)} edges', file=f)
                     print(f'Optimum: {problem.optimum}', file=f)
+                    print(f'Lower bound: {problem.bounds.value(jackson=True)}', file=f)
                     print(f'Solution: {problem.solution.makespan}', file=f)
+                    # gap is meaningful only if the schedule respects coflow DAG precedence
+                    if problem.solution.is_feasible():
+                        print(f'Gap: {problem.bounds.gap(problem.solution.makespan, jackson=True):.2%}', file=f)
+                    else:
+                        print('Gap: n.a. (infeasible: coflow DAG precedence violated)', file=f)
                     print(f'Terminate successfully in {s.user_time} sec.', file=f)
                 else:
                     print(f'Solving process failed in {s.user_time} sec.', file=f)
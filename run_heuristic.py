@@ -2,7 +2,7 @@ import logging, json, os
 from model.problem import CFSProblem
 from model.solution import CFSSolution
 from solver.pulp import PuLPSolver
-from solver.dispatching_rule import PriorityDispatchSolver
+from solver.portfolio import PortfolioSolver
 
 
 def print_intermediate_solution(solution:CFSSolution):
@@ -24,27 +24,34 @@ if __name__=='__main__':
         for flow_nums in traffic_scale:
             instance_file = f'{topo_id}_{str(flow_nums)}_h'
             # ----------------------------------------
-            # solve cfs problem by PriorityDispatchSolver
+            # solve cfs problem by PortfolioSolver: load instance once for all rules
             # ----------------------------------------
             rules = ['spt', 'lpt', 'sps', 'lps', 'stpt', 'ltpt', 
                      'ect', 'lct', 'swt', 'lwt', 'ltwr', 'mtwr', 
                      'est', 'lst', 'hh', 'ihh']
+            problem = CFSProblem(benchmark=f'{topo_id}_{str(flow_nums)}')
+            s = PortfolioSolver(rules=rules)
+
+            s.solve(problem=problem, interval=2000, callback=print_intermediate_solution)
+            s.wait()
+            # ----------------------------------------
+            # save simulation result
+            # ----------------------------------------
             for rule in rules:
-                problem = CFSProblem(benchmark=f'{topo_id}_{str(flow_nums)}')
-                s = PriorityDispatchSolver(rule=rule)
-
-                s.solve(problem=problem, interval=2000, callback=print_intermediate_solution)
-                s.wait()
-                # ----------------------------------------
-                # save simulation result
-                # ----------------------------------------
                 result_path = os.path.join(benchmark_path, f'results_h/{instance_file}_{rule}')
                 with open(result_path, 'w') as f:
                     if s.status:
+                        makespan, user_time = s.results[rule]
                         print(f'Problem: {len(problem.flows)} flows, {len(problem.edges)} edges', file=f)
                         print(f'Optimum: {problem.optimum}', file=f)
-                        print(f'Solution: {problem.solution.makespan}', file=f)
-                        print(f'Terminate successfully in {s.user_time} sec.', file=f)
+                        print(f'Lower bound: {problem.bounds.value(jackson=True)}', file=f)
+                        print(f'Solution: {makespan}', file=f)
+                        # gap is meaningful only if the schedule respects coflow DAG precedence
+                        if s.feasibility[rule]:
+                            print(f'Gap: {problem.bounds.gap(makespan, jackson=True):.2%}', file=f)
+                        else:
+                            print('Gap: n.a. (infeasible: coflow DAG precedence violated)', file=f)
+                        print(f'Terminate successfully in {round(user_time, 1)} sec.', file=f)
                     else:
                         print(f'Solving process failed in {s.user_time} sec.', file=f)
     
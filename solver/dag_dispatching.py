@@ -0,0 +1,140 @@
+'''
+Dispatching operations by the precedence in coflow DAG rather than a linear flow chain:
+an operation is released to the ready set as soon as all its predecessors in the DAG are
+dispatched, so parallel branches of a coflow are scheduled concurrently.
+
+The ready operations are kept in a priority queue ordered by one of the rules below, where
+
+- Earliest Start Time : max(finish time of DAG predecessors, available time of the edge)
+- Tail Time           : longest processing time from the operation to the end of coflow
+
+No. Rules   Description
+----------------------------------------------------
+1   EST     Earliest Start Time, then the longest tail time
+2   SPT     Shortest Processing Time
+3   LPT     Longest Processing Time
+4   LTWR    Least Total Work Remaining, i.e. the shortest tail time
+5   MTWR    Most Total Work Remaining, i.e. the longest tail time
+'''
+
+import heapq
+from itertools import count
+from collections import defaultdict
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from common.graph import IndexedGraph
+
+
+class DAGDispatchSolver(JSSolver):
+    '''Ready-set Dispatching Solver based on coflow DAG.'''
+
+    # priority by processing time, earliest start time and tail time of the ready operation:
+    # the lower value, the higher priority
+    RULES = {
+        'EST' : lambda duration, est, tail: (est, -tail),
+        'SPT' : lambda duration, est, tail: duration,
+        'LPT' : lambda duration, est, tail: -duration,
+        'LTWR': lambda duration, est, tail: tail,
+        'MTWR': lambda duration, est, tail: -tail
+    }
+
+    # rules depending on the available time of edge
+    EDGE_RULES = ('EST',)
+
+    def __init__(self, name:str=None, rule:str='est') -> None:
+        '''Dispatching ready operations with priority defined by pre-defined rule.
+
+        Args:
+            name (str, optional): Solver name.
+            rule (str, optional): Pre-defined rule name in `RULES`. Defaults to 'est'.
+        '''
+        super().__init__(name)
+        # keep the rule name only, so the solver can be pickled to worker process
+        self.__rule_name = rule.upper()
+        if self.__rule_name not in self.RULES:
+            raise JSPException('Invalid rule name.')
+
+
+    def do_solve(self, problem:CFSProblem):
+        solution = CFSSolution(problem=problem)
+        self.solving_iteration(solution)
+        problem.update_solution(solution=solution)
+
+
+    def solving_iteration(self, solution:CFSSolution):
+        '''Dispatch operations in the order of DAG precedence and priority, and set the start
+        time of operation steps directly.'''
+        rule = self.RULES[self.__rule_name]
+        ops = solution.ops
+        num = len(ops)
+        index = {op: i for i, op in enumerate(ops)}
+        precedence = solution.precedence
+        successors = [[index[next_op] for next_op in precedence[op]] for op in ops]
+        durations = [op.source.duration for op in ops]
+        edges = [op.source.edge for op in ops]
+
+        # in-degree counters and the time when all predecessors are finished
+        in_degrees = [0] * num
+        for next_ops in successors:
+            for j in next_ops: in_degrees[j] += 1
+        release_times = [0.0] * num
+
+        # tail time: the longest path from each operation to the end of coflow
+        graph = IndexedGraph.from_edges(num, [(i, j) for i, next_ops in enumerate(successors) for j in next_ops])
+        res = graph.heads_and_tails(durations)
+        if res is None:
+            raise JSPException('Cycle exists in coflow precedence.')
+        tails = (res[1] + durations).tolist()
+
+        # the first imminent operation in flow sequence is dispatched if same priority
+        flow_index = {flow_step.source: i for i, flow_step in enumerate(solution.flow_ops)}
+        flows = [flow_index[op.source.flow] for op in ops]
+
+        edge_times = defaultdict(float) # edge -> available time
+        edge_ops = defaultdict(set)     # edge -> ready operations to dispatch to this edge
+        keys = {}                       # ready operation -> the latest priority
+        queue = []                      # (priority, counter, operation)
+        counter = count()
+
+        def push(i:int):
+            est = max(release_times[i], edge_times[edges[i]])
+            key = (rule(durations[i], est, tails[i]), flows[i], i)
+            keys[i] = key
+            heapq.heappush(queue, (key, next(counter), i))
+
+        for i in range(num):
+            if in_degrees[i]: continue
+            push(i)
+            edge_ops[edges[i]].add(i)
+
+        # dispatch ready operation by priority
+        while queue:
+            key, _, i = heapq.heappop(queue)
+            if keys.get(i)!=key: continue # outdated
+            del keys[i]
+            edge = edges[i]
+            edge_ops[edge].discard(i)
+
+            start_time = max(release_times[i], edge_times[edge])
+            ops[i].update_start_time(start_time)
+            end_time = start_time + durations[i]
+            edge_times[edge] = end_time
+
+            # release succeeding operations once all predecessors are dispatched
+            for j in successors[i]:
+                release_times[j] = max(release_times[j], end_time)
+                in_degrees[j] -= 1
+                if in_degrees[j]: continue
+                push(j)
+                edge_ops[edges[j]].add(j)
+
+            # update priority of operations waiting on the same edge
+            if self.__rule_name in self.EDGE_RULES:
+                for j in edge_ops[edge]: push(j)
+
+            # drop outdated items
+            if len(queue) > 2*len(keys):
+                queue[:] = [(key, next(counter), j) for j, key in keys.items()]
+                heapq.heapify(queue)
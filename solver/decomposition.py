@@ -0,0 +1,68 @@
+'''
+Solve independent sub-problems separately: flows sharing no edge with each other, even indirectly,
+do not interact, so the problem is split by the connected components of flow-edge conflict graph.
+Each sub-problem is solved by a copy of the specified solver, in sequence by default, or in a 
+process pool; the schedules are then merged, where the makespan is the maximum of all parts.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+
+
+class DecompositionSolver(JSSolver):
+
+    def __init__(self, solver:JSSolver, name:str='decomposition', processes:int=None) -> None:
+        '''Solve each independent sub-problem with the specified solver and merge the schedules.
+
+        Args:
+            solver (JSSolver): Solver for each sub-problem, e.g. `PuLPSolver()`. It is pickled to
+                worker processes if `processes` is set.
+            name (str, optional): Solver name.
+            processes (int, optional): Count of worker processes. Defaults to None, i.e. solve 
+                sub-problems in current process one by one.
+        '''
+        super().__init__(name)
+        self.__solver = solver
+        self.__processes = processes
+        self.__num_parts = 0
+
+
+    @property
+    def num_parts(self) -> int:
+        '''Count of independent sub-problems.'''
+        return self.__num_parts
+
+
+    def do_solve(self, problem:CFSProblem):
+        parts = problem.decompose()
+        self.__num_parts = len(parts)
+        args = [(self.__solver, part) for part in parts]
+
+        # solve in current process if only one sub-problem
+        if not self.__processes or len(parts)==1:
+            results = list(map(_solve, args))
+        else:
+            with ProcessPoolExecutor(max_workers=self.__processes) as executor:
+                results = list(executor.map(_solve, args))
+
+        # merge schedules, and link the edge chains in the order of start time
+        solution = CFSSolution(problem)
+        for part, start_times in zip(parts, results):
+            for op, start_time in zip(part.ops, start_times):
+                solution.find(op).update_start_time(start_time)
+        for edge_step, ops in solution.edge_ops.items():
+            pre = edge_step
+            for op in sorted(ops, key=lambda op: op.start_time):
+                op.pre_edge_op = pre
+                pre = op
+        problem.update_solution(solution)
+
+
+def _solve(args:tuple) -> list:
+    '''Solve the sub-problem, and return the start time of each operation.'''
+    solver, problem = args
+    solver.do_solve(problem)
+    solution = problem.solution # type: CFSSolution
+    return [solution.find(op).start_time for op in problem.ops]
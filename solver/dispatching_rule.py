@@ -40,6 +40,9 @@ and 3 dynamic parameters depending on the passage of time:
 - Total Work Remaining  : The time for a job to complete the remaining operations. 
 '''
 
+import heapq
+from itertools import count
+from collections import defaultdict
 from jsp_fwk.common.exception import JSPException
 from jsp_fwk.model.solver import JSSolver
 from model.variable import TransOperationStep
@@ -51,8 +54,10 @@ from model.solution import CFSSolution
 
 class PriorityDispatchSolver(JSSolver):
     '''General Priority Dispatching Solver.'''
+
+    REKEY_SCOPES = ('none', 'edge', 'all')
     
-    def __init__(self, name:str=None, rule:str=None, fun_rule=None) -> None:
+    def __init__(self, name:str=None, rule:str=None, fun_rule=None, rekey:str='all', bulk:bool=False) -> None:
         '''Dispatching operation with priority defined by pre-defined or user rule.
 
         Args:
@@ -65,15 +70,35 @@ class PriorityDispatchSolver(JSSolver):
             ```python
             def fun_rule(op:OperationStep, solution:JSSolution) -> tuple
             ```
+            rekey (str, optional): Imminent operations to re-evaluate with `fun_rule` after each
+            dispatching: 'none' for static priority, 'edge' for operations waiting on the same 
+            edge, or 'all'. Defaults to 'all'. Determined automatically for pre-defined rules.
+            bulk (bool, optional): If `fun_rule` is a static rule evaluated in bulk. It takes the
+            static features of all operations and the solution as inputs, and returns an array of
+            priorities in the sequence of `solution.ops`. Defaults to False.
+
+            ```python
+            def fun_rule(features:OperationFeatures, solution:CFSSolution) -> np.ndarray
+            ```
         '''        
         super().__init__(name)
 
+        self.__bulk_rule = None
         if rule:
             self.__dispatching_rule = DisPatchingRules.get(rule.upper())
+            self.__bulk_rule = DisPatchingRules.BULK_RULES.get(rule.upper(), None)
+            self.__rekey = 'edge' if rule.upper() in DisPatchingRules.EDGE_RULES else 'none'
+        elif fun_rule and bulk:
+            self.__bulk_rule = fun_rule
+            self.__rekey = 'none'
         elif fun_rule:
             self.__dispatching_rule = fun_rule
+            self.__rekey = rekey
         else:
             raise JSPException('Invalid rule.')
+        
+        if self.__rekey not in self.REKEY_SCOPES:
+            raise JSPException(f'Invalid rekey scope: {rekey}.')
     
 
     def do_solve(self, problem: CFSProblem):
@@ -83,33 +108,91 @@ class PriorityDispatchSolver(JSSolver):
     
 
     def solving_iteration(self, solution:CFSSolution):
-        '''One iteration applying priority dispatching rule.'''
-        # move form
+        '''One iteration applying priority dispatching rule.
+
+        Imminent operations are kept in a priority queue: the priority is evaluated once when an
+        operation becomes imminent, and evaluated again only when it might be changed, i.e. 
+        another operation is dispatched to the same edge, or any edge for `rekey='all'`.
+        Outdated queue items are skipped when popped.
+        '''
+        # the flow sequence breaks ties, i.e. the first imminent operation in flow sequence
+        # is dispatched if same priority
+        flow_index = {flow_step.source: i for i, flow_step in enumerate(solution.flow_ops)}
+        counter = count()
+
+        # static priorities of all operations evaluated at once
+        if self.__bulk_rule:
+            features = solution.features
+            priorities = self.__bulk_rule(features, solution).tolist()
+            fun_priority = lambda op: priorities[features.index(op)]
+        else:
+            fun_priority = lambda op: self.__dispatching_rule(op, solution)
+
+        keys = {}                   # imminent operation -> the latest priority
+        edge_ops = defaultdict(set) # edge -> imminent operations to dispatch to this edge
+        queue = []                  # (priority, counter, operation)
+
+        def push(op:TransOperationStep):
+            key = (fun_priority(op), flow_index[op.source.flow])
+            keys[op] = key
+            heapq.heappush(queue, (key, next(counter), op))
+        
         # collect imminent operations in the processing queue
-        head_ops = solution.imminent_ops
+        for op in solution.imminent_ops:
+            push(op)
+            edge_ops[op.source.edge].add(op)
 
         # dispatch operation by priority
-        while head_ops:
+        while queue:
             # dispatch operation with the first priority
-            op = min(head_ops, key=lambda op: self.__dispatching_rule(op, solution))
+            key, _, op = heapq.heappop(queue)
+            if keys.get(op)!=key: continue # outdated
+            del keys[op]
+            edge = op.source.edge
+            edge_ops[edge].discard(op)
             solution.dispatch(op)
             
             # update imminent operations
-            pos = head_ops.index(op)
             next_flow_op = op.next_flow_op
-            if next_flow_op is None:
-                head_ops = head_ops[0:pos] + head_ops[pos+1:]
-            else:
-                head_ops[pos] = next_flow_op
+            if next_flow_op is not None:
+                push(next_flow_op)
+                edge_ops[next_flow_op.source.edge].add(next_flow_op)
+            
+            # update priority of affected operations
+            if self.__rekey=='edge':
+                for edge_op in edge_ops[edge]: push(edge_op)
+            elif self.__rekey=='all':
+                for head_op in list(keys): push(head_op)
+
+            # drop outdated items
+            if len(queue) > 2*len(keys):
+                queue = [(key, next(counter), op) for op, key in keys.items()]
+                heapq.heapify(queue)
 
 
 class DisPatchingRules:
 
+    # rules depending on the edge chain, i.e. the priority of an imminent operation is changed 
+    # when other operations are dispatched to the same edge
+    EDGE_RULES = ('SWT', 'LWT', 'EST', 'LST', 'HH', 'IHH')
+
+    # static rules evaluated in bulk, i.e. priorities of all operations from static features
+    BULK_RULES = {
+        'SPT' : lambda features, solution: features.durations,
+        'LPT' : lambda features, solution: -features.durations,
+        'SPS' : lambda features, solution: features.process_sequence,
+        'LPS' : lambda features, solution: -features.process_sequence,
+        'STPT': lambda features, solution: features.total_processing_time,
+        'LTPT': lambda features, solution: -features.total_processing_time,
+        'LTWR': lambda features, solution: features.work_remaining,
+        'MTWR': lambda features, solution: -features.work_remaining
+    }
+
     @classmethod
     def get(cls, name:str):
         '''Get rule method by name.'''
         fun_rule = cls.__dict__.get(name, None)
-        if not fun_rule:
+        if not isinstance(fun_rule, staticmethod):
             raise JSPException('Invalid rule name.')
         return fun_rule.__func__
 
@@ -125,14 +208,14 @@ class DisPatchingRules:
     @staticmethod
     def PS(op:TransOperationStep, solution:CFSSolution):
         '''Process Sequence.'''
-        flow = solution.flow_head(op)
-        return len(solution.flow_ops[flow])   
+        features = solution.features
+        return features.process_sequence[features.index(op)]
 
     @staticmethod
     def TPT(op:TransOperationStep, solution:CFSSolution):
         '''Total Processing Time.'''
-        flow = solution.flow_head(op)
-        return sum(op.source.duration for op in solution.flow_ops[flow]) 
+        features = solution.features
+        return features.total_processing_time[features.index(op)]
     
 
     # dynamic parameters: 
@@ -154,12 +237,8 @@ class DisPatchingRules:
     @staticmethod
     def TWR(op:TransOperationStep, solution:CFSSolution):
         '''Total Work Remaining.'''
-        num = 0
-        ref = op
-        while ref:
-            num += ref.source.duration
-            ref = ref.next_flow_op
-        return num
+        features = solution.features
+        return features.work_remaining[features.index(op)]
 
     # ------------------------------
     # static rules
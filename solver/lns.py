@@ -0,0 +1,167 @@
+'''
+Large Neighborhood Search (fix-and-optimize) on top of `PuLPSolver`: starting from a dispatching
+rule schedule, each iteration frees a few operations of the incumbent solution, and re-optimizes
+them with `PuLPSolver`, where the other operations keep their sequence on edge. The neighborhood
+is selected by the following strategies in turn:
+
+- critical : segments of edge sequence around the operations on critical path
+- load     : segments of edge sequence on the most loaded edges
+- random   : segments of edge sequence on random edges
+- flow     : all operations of random flows on critical path
+
+A neighborhood is accepted if the makespan is not worse, and the improvement is published by
+`problem.update_solution()`, until the time budget is spent or the lower bound is reached.
+'''
+
+import random, time
+from collections import defaultdict
+from common.graph import DirectedGraph
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from solver.dag_dispatching import DAGDispatchSolver
+from solver.pulp import PuLPSolver
+
+
+class LNSSolver(JSSolver):
+
+    STRATEGIES = ('critical', 'load', 'random', 'flow')
+
+    def __init__(self, name:str='lns', rule:str='est', max_time:int=600, iteration_time:int=10,
+                    num_edges:int=2, size:int=40, strategies:tuple=None, solver_name:str='CBC',
+                    seed:int=None) -> None:
+        '''Improve the schedule of a dispatching rule by re-optimizing neighborhoods.
+
+        Args:
+            name (str, optional): Solver name.
+            rule (str, optional): Rule name of `DAGDispatchSolver` for the initial solution.
+                Defaults to 'est'.
+            max_time (int, optional): Time budget in seconds. Defaults to 600.
+            iteration_time (int, optional): Max solving time of each neighborhood. Defaults to 10.
+            num_edges (int, optional): Count of edges or flows selected in each neighborhood.
+                Defaults to 2.
+            size (int, optional): Max count of operations freed in each neighborhood. Defaults
+                to 40.
+            strategies (tuple, optional): Neighborhood strategies used in turn. Defaults to None,
+                i.e. all strategies in `STRATEGIES`.
+            solver_name (str, optional): MIP solver name of `PuLPSolver`. Defaults to 'CBC'.
+            seed (int, optional): Random seed. Defaults to None.
+        '''
+        super().__init__(name)
+        self.__rule = rule
+        self.__max_time = max_time
+        self.__iteration_time = iteration_time
+        self.__num_edges = num_edges
+        self.__size = size
+        self.__strategies = strategies or self.STRATEGIES
+        if any(strategy not in self.STRATEGIES for strategy in self.__strategies):
+            raise JSPException('Invalid neighborhood strategy.')
+        self.__solver_name = solver_name
+        self.__random = random.Random(seed)
+
+        # count of iterations and improvements
+        self.__num_iterations = 0
+        self.__num_improvements = 0
+
+
+    @property
+    def num_iterations(self) -> int:
+        '''Count of solved neighborhoods.'''
+        return self.__num_iterations
+
+    @property
+    def num_improvements(self) -> int:
+        '''Count of neighborhoods improving the makespan.'''
+        return self.__num_improvements
+
+
+    def do_solve(self, problem:CFSProblem):
+        start = time.perf_counter()
+        self.__num_iterations = self.__num_improvements = 0
+
+        # initial solution
+        solution = CFSSolution(problem)
+        DAGDispatchSolver(rule=self.__rule).solving_iteration(solution)
+        problem.update_solution(solution)
+
+        # neighborhoods are solved with a shadow problem sharing the operations
+        shadow = CFSProblem(ops=problem.ops)
+
+        # stop once the lower bound is reached
+        best = solution.makespan
+        bound = problem.bounds.value(jackson=True)
+        while best > bound:
+            remaining = self.__max_time - (time.perf_counter()-start)
+            if remaining < 1: break
+
+            strategy = self.__strategies[self.__num_iterations % len(self.__strategies)]
+            neighborhood = self.__select(strategy, problem, solution)
+            self.__num_iterations += 1
+
+            try:
+                PuLPSolver(solver_name=self.__solver_name,
+                           max_time=min(self.__iteration_time, int(remaining)),
+                           initial_solution=solution,
+                           tie_break=True,
+                           neighborhood=neighborhood).do_solve(shadow)
+            except JSPException:
+                continue
+
+            # accept the neighborhood if not worse
+            if shadow.solution.makespan > best: continue
+            solution = CFSSolution(problem)
+            for op in problem.ops:
+                solution.find(op).update_start_time(shadow.solution.find(op).start_time)
+            if solution.makespan < best:
+                best = solution.makespan
+                self.__num_improvements += 1
+                problem.update_solution(solution)
+
+
+    def __select(self, strategy:str, problem:CFSProblem, solution:CFSSolution) -> set:
+        '''Select operations to free by the strategy.'''
+        if strategy=='flow':
+            flows = list({op.flow for op in self.__critical_ops(problem, solution)})
+            flows = self.__random.sample(flows, min(self.__num_edges, len(flows)))
+            ops = [op for op in problem.ops if op.flow in flows]
+            return set(ops[:self.__size])
+
+        # edges and the center operation of segment on each edge
+        edge_ops = defaultdict(list)
+        for op in problem.ops: edge_ops[op.edge].append(op)
+        if strategy=='critical':
+            centers = defaultdict(list)
+            for op in self.__critical_ops(problem, solution): centers[op.edge].append(op)
+            edges = self.__random.sample(list(centers), min(self.__num_edges, len(centers)))
+            centers = {edge: self.__random.choice(centers[edge]) for edge in edges}
+        else:
+            if strategy=='load':
+                loads = {edge: sum(op.duration for op in ops) for edge, ops in edge_ops.items()}
+                edges = sorted(loads, key=loads.get, reverse=True)[:2*self.__num_edges]
+            else:
+                edges = list(edge_ops)
+            edges = self.__random.sample(edges, min(self.__num_edges, len(edges)))
+            centers = {edge: self.__random.choice(edge_ops[edge]) for edge in edges}
+
+        # segment of edge sequence around the center operation
+        neighborhood = set()
+        size = self.__size // max(len(centers), 1)
+        for edge, center in centers.items():
+            ops = sorted(edge_ops[edge], key=lambda op: solution.find(op).start_time)
+            i = max(ops.index(center)-size//2, 0)
+            neighborhood.update(ops[i:i+size])
+        return neighborhood
+
+
+    @staticmethod
+    def __critical_ops(problem:CFSProblem, solution:CFSSolution) -> list:
+        '''Operations on a critical path of the schedule, i.e. the longest path in the graph of
+        coflow precedence and the sequence of operations on each edge.'''
+        graph = DirectedGraph()
+        for op, next_ops in problem.precedence.items():
+            for next_op in next_ops: graph.add_edge(op, next_op)
+        for _, ops in solution.edge_ops.items():
+            ops = sorted(ops, key=lambda op: op.start_time)
+            for op, next_op in zip(ops, ops[1:]): graph.add_edge(op.source, next_op.source)
+        return graph.critical_path(lambda op: op.duration)
@@ -0,0 +1,224 @@
+'''
+Direct MIP model writer for the CoFlow Schedule formulation of `PuLPSolver`: the constraint matrix
+is generated in bulk with NumPy from the operation arrays and written to an MPS file directly,
+without any pulp variable or affine expression. The backend is called by command line, and the
+values in solution file are mapped back to the start time of operation steps.
+
+Columns are the start time `S{i}` of each operation, the makespan `SMAX` and the sequence `Y{k}`
+of each pair of operations (a, b) on same edge, where all rows are ">=" constraints:
+
+- makespan   : SMAX - S{i} >= d_i                  for the last operations in coflow DAG
+- precedence : S{j} - S{i} >= d_i                  for each arc i -> j in coflow DAG
+- no overlap : S{a} - S{b} - M*Y{k} >= d_b - M     i.e. a after b if Y{k}=1
+               S{b} - S{a} + M*Y{k} >= d_a         i.e. b after a if Y{k}=0
+'''
+
+import logging, os, re, subprocess, tempfile
+import numpy as np
+import pulp
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+
+
+def _lines(prefix:str, *fields) -> list:
+    '''Text lines of the fields in columns, i.e. prefix + fields joined by space.'''
+    return [prefix+' '.join(line) for line in zip(*(field.tolist() for field in fields))]
+
+
+class MPSSolver(JSSolver):
+
+    # backend executables are located by the pulp commands
+    SOLVER_DICT = {
+        'CBC': pulp.PULP_CBC_CMD,
+        'SCIP': pulp.SCIP_CMD,
+        'GUROBI': pulp.GUROBI_CMD,
+        'CPLEX': pulp.CPLEX_CMD
+    }
+
+    def __init__(self, name:str='mps', solver_name:str='CBC', max_time:int=None, msg:bool=False,
+                    work_dir:str=None) -> None:
+        '''Solve the CoFlow Schedule MIP by writing MPS file directly.
+
+        Args:
+            name (str, optional): Solver name.
+            solver_name (str, optional): MIP backend, 'CBC', 'CPLEX', 'SCIP' or 'GUROBI'.
+                Defaults to 'CBC'.
+            max_time (int, optional): Max solving time in seconds. Defaults to None, i.e. no limit.
+            msg (bool, optional): Show backend log or not. Defaults to False.
+            work_dir (str, optional): Directory to keep the model and solution files. Defaults to
+                None, i.e. a temporary directory removed after solving.
+        '''
+        super().__init__(name)
+        self.__solver_name = solver_name.upper()
+        if self.__solver_name not in self.SOLVER_DICT:
+            raise JSPException('Invalid MIP solver name.')
+        self.__max_time = max_time
+        self.__msg = msg
+        self.__work_dir = work_dir
+
+
+    def do_solve(self, problem:CFSProblem):
+        solution = CFSSolution(problem)
+        if self.__work_dir:
+            os.makedirs(self.__work_dir, exist_ok=True)
+            values = self.__solve_in(solution, self.__work_dir)
+        else:
+            with tempfile.TemporaryDirectory() as work_dir:
+                values = self.__solve_in(solution, work_dir)
+
+        for op, value in zip(solution.ops, values):
+            op.update_start_time(value)
+        if not solution.is_feasible():
+            raise JSPException('No feasible solution found.')
+        problem.update_solution(solution)
+
+
+    def __solve_in(self, solution:CFSSolution, work_dir:str) -> np.ndarray:
+        '''Write model, call backend and read start times in the work directory.'''
+        mps_path = os.path.join(work_dir, 'cfs.mps')
+        sol_path = os.path.join(work_dir, 'cfs.sol')
+        names = self.write_mps(solution, mps_path)
+
+        cmd = self.__command(mps_path, sol_path)
+        logging.info(f'Solving {mps_path} with {self.__solver_name}')
+        out = None if self.__msg else subprocess.DEVNULL
+        subprocess.run(cmd, stdout=out, stderr=out, cwd=work_dir, check=False)
+        if not os.path.exists(sol_path):
+            raise JSPException('No feasible solution found.')
+
+        values = self.__read_solution(sol_path)
+        return np.round([values.get(name, 0.0) for name in names[:len(solution.ops)]], 6)
+
+
+    @staticmethod
+    def create_matrix(solution:CFSSolution) -> tuple:
+        '''Constraint matrix in coordinate format. Column i refers to the start time of the i-th
+        operation in `solution.ops`, column n to the makespan, and column n+1+k to the k-th pair.
+
+        Returns:
+            tuple: (rows, cols, coefficients, rhs, big-M, number of pairs)
+        '''
+        ops = solution.ops
+        num = len(ops)
+        index = {op: i for i, op in enumerate(ops)}
+        durations = np.array([op.source.duration for op in ops], dtype=float)
+        big_m = durations.sum()
+
+        # arcs and the last operations in coflow DAG
+        precedence = solution.precedence
+        arcs = np.array([(index[op], index[next_op]) for op, next_ops in precedence.items() \
+                            for next_op in next_ops], dtype=int).reshape(-1, 2)
+        sinks = np.array([index[op] for op, next_ops in precedence.items() if not next_ops], dtype=int)
+
+        # pairs of operations on same edge
+        pairs = []
+        for _, edge_ops in solution.edge_ops.items():
+            ids = np.array([index[op] for op in edge_ops], dtype=int)
+            a, b = np.triu_indices(len(ids), k=1)
+            pairs.append(np.column_stack((ids[a], ids[b])))
+        pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=int)
+        num_pairs = len(pairs)
+        ys = num + 1 + np.arange(num_pairs)
+
+        # rows: makespan, precedence, a after b, b after a
+        s, p = len(sinks), len(arcs)
+        rows_sink = np.arange(s)
+        rows_arc = s + np.arange(p)
+        rows_ab = s + p + np.arange(num_pairs)
+        rows_ba = s + p + num_pairs + np.arange(num_pairs)
+        a, b = pairs[:, 0], pairs[:, 1]
+
+        rows = np.concatenate((rows_sink, rows_sink, rows_arc, rows_arc,
+                                rows_ab, rows_ab, rows_ab, rows_ba, rows_ba, rows_ba))
+        cols = np.concatenate((np.full(s, num), sinks, arcs[:, 1], arcs[:, 0],
+                                a, b, ys, b, a, ys))
+        coefs = np.concatenate((np.ones(s), -np.ones(s), np.ones(p), -np.ones(p),
+                                np.ones(num_pairs), -np.ones(num_pairs), np.full(num_pairs, -big_m),
+                                np.ones(num_pairs), -np.ones(num_pairs), np.full(num_pairs, big_m)))
+        rhs = np.concatenate((durations[sinks], durations[arcs[:, 0]],
+                                durations[b] - big_m, durations[a]))
+        return rows, cols, coefs, rhs, big_m, num_pairs
+
+
+    @classmethod
+    def write_mps(cls, solution:CFSSolution, path:str) -> np.ndarray:
+        '''Write the MIP model of solution to MPS file.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            path (str): MPS file path.
+
+        Returns:
+            np.ndarray: Column names.
+        '''
+        rows, cols, coefs, rhs, big_m, num_pairs = cls.create_matrix(solution)
+        num = len(solution.ops)
+        names = np.concatenate((np.char.add('S', np.arange(num).astype(str)), ['SMAX'],
+                                np.char.add('Y', np.arange(num_pairs).astype(str))))
+        row_names = np.char.add('R', np.arange(len(rhs)).astype(str))
+
+        # entries grouped by column, with the objective coefficient of makespan
+        order = np.argsort(cols, kind='stable')
+        cols, rows, coefs = cols[order], rows[order], coefs[order]
+        pos = np.searchsorted(cols, num)
+        entries = _lines(' ', names[cols], row_names[rows], coefs.astype(str))
+        entries.insert(pos, ' SMAX OBJ 1')
+
+        # bounds: integer start times within big-M, and binary sequences
+        bounds = _lines(' UP BND ', names[:num+1], np.full(num+1, str(big_m))) + \
+                    _lines(' BV BND ', names[num+1:])
+        nonzero = np.flatnonzero(rhs)
+        rhs_lines = _lines(' RHS ', row_names[nonzero], rhs[nonzero].astype(str))
+
+        with open(path, 'w') as f:
+            f.write('NAME CFS\nROWS\n N OBJ\n')
+            f.write('\n'.join(_lines(' G ', row_names)))
+            f.write('\nCOLUMNS\n MARKER \'MARKER\' \'INTORG\'\n')
+            f.write('\n'.join(entries))
+            f.write('\n MARKER \'MARKER\' \'INTEND\'\nRHS\n')
+            f.write('\n'.join(rhs_lines))
+            f.write('\nBOUNDS\n')
+            f.write('\n'.join(bounds))
+            f.write('\nENDATA\n')
+        return names
+
+
+    def __command(self, mps_path:str, sol_path:str) -> list:
+        '''Command line of backend.'''
+        path = self.SOLVER_DICT[self.__solver_name]().path
+        t = self.__max_time
+        if self.__solver_name=='CBC':
+            cmd = [path, mps_path] + (['-sec', str(t), '-timeMode', 'elapsed'] if t else [])
+            return cmd + ['-branch', '-printingOptions', 'all', '-solution', sol_path]
+        if self.__solver_name=='CPLEX':
+            cmd = [path, '-c', f'read {mps_path}'] + ([f'set timelimit {t}'] if t else [])
+            return cmd + ['mipopt', f'write {sol_path}', 'quit']
+        if self.__solver_name=='SCIP':
+            cmds = [f'read {mps_path}'] + ([f'set limits time {t}'] if t else []) + \
+                    ['optimize', f'write solution {sol_path}', 'quit']
+            return [path] + [arg for c in cmds for arg in ('-c', c)]
+        # GUROBI
+        return [path] + ([f'TimeLimit={t}'] if t else []) + [f'ResultFile={sol_path}', mps_path]
+
+
+    def __read_solution(self, path:str) -> dict:
+        '''Column values in solution file: {name: value}. Columns not found are zero, e.g. SCIP
+        writes the non-zero values only.'''
+        with open(path, 'r') as f: content = f.read()
+
+        # CPLEX: XML solution
+        if self.__solver_name=='CPLEX':
+            pattern = r'<variable name="(\S+)"[^>]*value="(\S+)"'
+            return {name: float(value) for name, value in re.findall(pattern, content)}
+
+        # CBC: [**] index name value reduced-cost; SCIP / GUROBI: name value ...
+        values = {}
+        header = content.split('\n', 1)[0].lower()
+        if any(text in header for text in ('infeasible', 'no feasible', 'no integer', 'no solution')):
+            raise JSPException('No feasible solution found.')
+        pattern = re.compile(r'^\s*(?:\*\*)?\s*(?:\d+\s+)?([SY]\d+|SMAX)\s+(\S+)', re.M)
+        for name, value in pattern.findall(content):
+            values[name] = float(value)
+        return values
@@ -0,0 +1,142 @@
+'''
+Run a portfolio of dispatching rules on one problem instance and keep the best schedule.
+
+The instance is loaded once and the static data, e.g. coflow paths and operation features, are
+shared by all rules. Rules are run in sequence by default, or in a process pool, where each
+worker process receives the operations once and returns the dispatching sequence only; the
+best schedule is then reproduced in current process. Rules are dispatched on the flow chain in
+topological order of coflow DAG by default, so the schedules are feasible and the gap to the lower
+bound of coflow DAG is meaningful.
+'''
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from solver.dispatching_rule import PriorityDispatchSolver
+
+
+RULES = ['spt', 'lpt', 'sps', 'lps', 'stpt', 'ltpt',
+         'ect', 'lct', 'swt', 'lwt', 'ltwr', 'mtwr',
+         'est', 'lst', 'hh', 'ihh']
+
+
+class PortfolioSolver(JSSolver):
+
+    def __init__(self, name:str='portfolio', rules:list=None, processes:int=None, 
+                    topological:bool=True) -> None:
+        '''Solve problem with a portfolio of pre-defined dispatching rules.
+
+        Args:
+            name (str, optional): Solver name.
+            rules (list, optional): Rule names. Defaults to None, i.e. all rules in `RULES`.
+            processes (int, optional): Count of worker processes. Defaults to None, i.e. run
+                rules in current process one by one.
+            topological (bool, optional): Dispatch on the flow chain in topological order of 
+                coflow DAG, so the schedules respect the precedence and compare with the lower 
+                bound of coflow DAG, see `CFSSolution`. Defaults to True.
+        '''
+        super().__init__(name)
+        self.__rules = rules or RULES
+        self.__processes = processes
+        self.__topological = topological
+
+        # rule -> (makespan, solving time in seconds)
+        self.__results = {}
+
+        # rule -> whether the schedule respects the precedence in coflow DAG
+        self.__feasibility = {}
+
+
+    @property
+    def results(self) -> dict:
+        '''Makespan and solving time of each rule: {rule: (makespan, time)}.'''
+        return self.__results
+
+
+    @property
+    def feasibility(self) -> dict:
+        '''Whether the schedule of each rule is feasible, i.e. respects the precedence in 
+        coflow DAG: {rule: bool}. Note the rules follow the flow chain rather than coflow DAG.'''
+        return self.__feasibility
+
+
+    @property
+    def best_rule(self) -> str:
+        '''The rule with minimum makespan.'''
+        if not self.__results: return None
+        return min(self.__rules, key=lambda rule: self.__results[rule][0])
+
+
+    def do_solve(self, problem:CFSProblem):
+        self.__results = {}
+        self.__feasibility = {}
+        if not self.__processes:
+            self.__solve_sequentially(problem)
+        else:
+            self.__solve_in_parallel(problem)
+
+        if not self.__results:
+            raise JSPException('No feasible solution found.')
+
+
+    def __solve_sequentially(self, problem:CFSProblem):
+        '''Run rules in current process.'''
+        best = float('inf')
+        for rule in self.__rules:
+            start = time.perf_counter()
+            solution = CFSSolution(problem, topological=self.__topological)
+            PriorityDispatchSolver(rule=rule).solving_iteration(solution)
+            self.__results[rule] = (solution.makespan, time.perf_counter()-start)
+            self.__feasibility[rule] = solution.is_feasible()
+
+            # update solution once a better one is found
+            if solution.makespan < best:
+                best = solution.makespan
+                problem.update_solution(solution)
+
+
+    def __solve_in_parallel(self, problem:CFSProblem):
+        '''Run rules in process pool and replay the best dispatching sequence.'''
+        with ProcessPoolExecutor(max_workers=self.__processes,
+                                 initializer=_init_worker,
+                                 initargs=(problem.ops, self.__topological)) as executor:
+            results = list(executor.map(_dispatch, self.__rules))
+
+        best_sequence, best = None, float('inf')
+        for rule, (makespan, user_time, feasible, sequence) in zip(self.__rules, results):
+            self.__results[rule] = (makespan, user_time)
+            self.__feasibility[rule] = feasible
+            if makespan < best: best_sequence, best = sequence, makespan
+
+        # dispatch in the same sequence to reproduce the best schedule
+        solution = CFSSolution(problem, topological=self.__topological)
+        for i in best_sequence: solution.dispatch(solution.ops[i])
+        problem.update_solution(solution)
+
+
+# ------------------------------
+# worker process
+# ------------------------------
+_problem = None # type: CFSProblem
+_topological = False
+
+def _init_worker(ops:list, topological:bool):
+    '''Initialize the problem shared by all rules in current worker process.'''
+    global _problem, _topological
+    _problem = CFSProblem(ops=ops)
+    _topological = topological
+
+
+def _dispatch(rule:str):
+    '''Solve with the specified rule, and return the makespan, solving time, feasibility and the 
+    dispatching sequence, i.e. positions of operation steps in topological order of the final schedule, which
+    keeps the sequence of operations in each edge chain.'''
+    start = time.perf_counter()
+    solution = CFSSolution(_problem, topological=_topological)
+    PriorityDispatchSolver(rule=rule).solving_iteration(solution)
+    sequence = [_problem.features.index(op) for op in solution.sorted_ops]
+    user_time = time.perf_counter() - start
+    return solution.makespan, user_time, solution.is_feasible(), sequence
@@ -1,3 +1,5 @@
+import logging, os, re, tempfile, time
+from threading import Thread
 import pulp
 from model.problem import CFSProblem
 from model.solution import CFSSolution
@@ -5,6 +7,9 @@ from jsp_fwk.model.solver import JSSolver
 from jsp_fwk.model.problem import JSProblem
 from jsp_fwk.model.solution import JSSolution
 from jsp_fwk.common.exception import JSPException
+from solver.dag_dispatching import DAGDispatchSolver
+from solver.dispatching_rule import PriorityDispatchSolver
+from common.graph import IndexedGraph
 
 class PuLPSolver(JSSolver):
 
@@ -15,7 +20,19 @@ class PuLPSolver(JSSolver):
         'CPLEX': pulp.CPLEX_CMD
     }
 
-    def __init__(self, name:str='pulp', solver_name:str='CBC', max_time:int=None, msg:bool=False, log_path:str=None) -> None:
+    # log line of an improving integer solution: the objective value in group 1, and the solving
+    # time in group 2 if any
+    INCUMBENT_PATTERNS = {
+        'CBC': r'Integer solution of (\S+) found.*\((\S+) seconds\)',
+        'CPLEX': r'Found incumbent of value (\S+) after (\S+) sec',
+        'GUROBI': r'Found heuristic solution: objective (\S+)'
+    }
+
+    def __init__(self, name:str='pulp', solver_name:str='CBC', max_time:int=None, msg:bool=False, log_path:str=None, 
+                    time_window:bool=False, initial_solution:CFSSolution=None, rule:str=None,
+                    stream:bool=False, fixed_times:dict=None,
+                    tails:dict=None, tie_break:bool=False, neighborhood:set=None, lazy:bool=False,
+                    max_rounds:int=10, incumbent_callback=None) -> None:
         '''Solve JSP with PuLP, which is an LP modeler written in python. PuLP can generate MPS 
         or LP files and call GLPK, COIN CLP/CBC, CPLEX, and GUROBI to solve linear problems.
 
@@ -24,12 +41,98 @@ class PuLPSolver(JSSolver):
             solver_name (str, optional): solver for MIP, default to CBC; support also SCIP or Gurobi.
             max_time (int, optional): Max solving time in seconds. Defaults to None, i.e. no limit.
             msg (bool, optional): show solver log or not. Default to False.
+            time_window (bool, optional): Bound the start time of each operation by a time window, 
+                i.e. the release time and latest start time derived from the critical path of coflow
+                and the horizon of a heuristic schedule, and derive the big-M of each disjunctive 
+                constraint from the windows. Default to False, i.e. the sum of all durations.
+            initial_solution (CFSSolution, optional): A schedule of the same problem passed to the
+                backend as MIP start, where the sequence of operations on each edge is kept and the 
+                start times are re-calculated by the precedence in coflow DAG. It is also the 
+                heuristic schedule to derive horizon when `time_window=True`; if not provided, the
+                schedule dispatched by the earliest start time in coflow DAG is taken for both. 
+                Defaults to None.
+            rule (str, optional): Name of dispatching rule to create the initial solution when 
+                `initial_solution` is not provided, e.g. 'est'. The schedule dispatched by the 
+                earliest start time in coflow DAG is taken instead if better, unless operations are 
+                fixed. Defaults to None, i.e. cold start.
+            stream (bool, optional): Tail the log of backend while solving, and report the objective 
+                of each improving integer solution in the meantime, see `incumbents` and 
+                `incumbent_callback`. The initial solution, if any, is published before solving,
+                while the final schedule is published after solving, since the backend writes the
+                solution at the end only. Defaults to False.
+            fixed_times (dict, optional): Start times of operations fixed in the model, i.e. 
+                {TransOperation: start time}, so only the others are optimized. The time window of
+                each free operation is then derived from the fixed ones, and disjunctive pairs are
+                always pruned. Defaults to None, i.e. all operations are free.
+            tails (dict, optional): Time still required after each operation completes, i.e. 
+                {TransOperation: tail}, which is included in the makespan, e.g. the remaining work
+                out of current model. Defaults to None.
+            tie_break (bool, optional): Add the total start time of free operations to the makespan
+                objective with a weight below 1/(count of free operations * horizon), so operations
+                are not delayed without reason when the makespan is determined by other ones, e.g.
+                fixed operations, while the makespan is still minimized first. Defaults to False.
+            neighborhood (set, optional): Operations (TransOperation) whose sequence on edge is 
+                optimized, while the other operations keep the sequence in initial solution, i.e. 
+                binary variables are created for the pairs involving these operations only. The 
+                initial solution is required. Defaults to None, i.e. all operations.
+            lazy (bool, optional): Add the disjunctive constraints on request, i.e. solve the model
+                with coflow precedence only, then add binary variables for the pairs of operations
+                overlapped in the result, and repeat until no overlap. `max_time` limits the total
+                solving time of all rounds. Not supported with `stream=True`, since the solutions 
+                of intermediate rounds are infeasible. Defaults to False.
+                NOTE: the rounds may not converge in time on large instances, where many pairs are
+                overlapped in each round. So each round takes at most half of the remaining time, 
+                and the full model is solved with the rest once `max_rounds` is reached or a round
+                finds no solution, starting from the initial solution, or the DAG heuristic 
+                schedule if not provided, which is also kept if the full model finds no better one.
+            max_rounds (int, optional): Max count of rounds in lazy mode before falling back to the
+                full model. Defaults to 10.
+            incumbent_callback (optional): Function called with (solving time in seconds, 
+                objective) once an improving integer solution is found in the log, while the 
+                backend is still running. Only available when `stream=True`. Defaults to None.
         '''        
         super().__init__(name)
         self.__solver_name = solver_name
         self.__msg = msg
         self.__max_time = max_time
         self.__log_path = log_path
+        self.__time_window = time_window
+        self.__num_pruned = 0
+        self.__initial_solution = initial_solution
+        self.__rule = rule
+        self.__stream = stream
+        self.__incumbent_callback = incumbent_callback
+        self.__fixed_times = fixed_times
+        self.__tails = tails or {}
+        self.__tie_break = tie_break
+        self.__neighborhood = neighborhood
+        self.__lazy = lazy
+        self.__max_rounds = max_rounds
+        self.__num_rounds = 0
+        self.__lower_bound = 0
+        if self.__lazy and self.__stream:
+            raise JSPException('Streaming incumbents is not supported in lazy mode.')
+        self.__incumbents = []
+
+
+    @property
+    def num_pruned(self) -> int:
+        '''Count of binary variables removed by the time windows of fixed operations.'''
+        return self.__num_pruned
+
+
+    @property
+    def num_rounds(self) -> int:
+        '''Count of models solved in lazy mode.'''
+        return self.__num_rounds
+
+
+    @property
+    def incumbents(self) -> list:
+        '''Improving objectives parsed from the backend log when `stream=True`: 
+        [(solving time in seconds, objective)]. The solving time is reported by backend if 
+        available, since the log might be flushed with a delay.'''
+        return self.__incumbents
 
 
     def do_solve(self, problem:CFSProblem):
@@ -40,41 +143,418 @@ class PuLPSolver(JSSolver):
         # Initialize an empty solution from problem
         solution = CFSSolution(problem)
        
-        # create model
-        model, variables = self.__create_model(solution)
+        # initial solution for MIP start
+        initial = self.__initial_solution
+        if not initial and self.__rule:
+            initial = CFSSolution(problem)
+            PriorityDispatchSolver(rule=self.__rule).solving_iteration(initial)
+        # time windows: derived from the fixed operations, or from the horizon of initial solution
+        if self.__fixed_times:
+            windows = self.__fixed_windows(solution)
+            start_times = self.__initial_start_times(solution, initial, windows[1]) if initial else None
+        else:
+            start_times = self.__initial_start_times(solution, initial) if initial else None
+            # the rule schedule follows the flow chain rather than coflow DAG, so it might be a weak
+            # MIP start after re-calculated: keep the better one of it and the DAG heuristic
+            if self.__rule and not self.__initial_solution:
+                heuristic_times = self.__heuristic_start_times(problem, solution)
+                makespan = lambda times: max(t+op.source.duration for op, t in times.items())
+                if not start_times or makespan(heuristic_times) < makespan(start_times):
+                    logging.info(f'MIP start: DAG heuristic schedule rather than rule {self.__rule}.')
+                    start_times = heuristic_times
+            elif (self.__time_window or self.__lazy) and not start_times:
+                start_times = self.__heuristic_start_times(problem, solution)
+            windows = self.__time_windows(solution, start_times) if self.__time_window else None
+       
+        if self.__neighborhood is not None and not start_times:
+            raise JSPException('Feasible initial solution is required to optimize neighborhood.')
+       
+        # disjunctive pairs
+        combinations, sequences = self.__disjunctive_pairs(solution, windows, start_times)
 
-        # solver
-        solver_cmd = self.SOLVER_DICT.get(self.__solver_name.upper(), pulp.PULP_CBC_CMD)
-        solver = solver_cmd(msg=self.__msg, timeLimit=self.__max_time, options=[f'set logfile {self.__log_path}'])
-        model.solve(solver)
-        if model.status!=pulp.LpStatusOptimal:
-            raise JSPException('No feasible solution found.')
+        # publish the initial solution before solving
+        if self.__stream and start_times:
+            for op, start_time in start_times.items():
+                op.update_start_time(start_time)
+            problem.update_solution(solution)
 
-        # assign pulp solution back to JSPSolution
-        for op, var in variables.items():
-            op.update_start_time(var.varValue)        
+        # lower bound of the makespan: the backend stops once an incumbent reaches it, and no
+        # need to solve if the initial solution reaches it already
+        self.__lower_bound = problem.bounds.value(jackson=True)
+        optimal = start_times and not self.__tie_break and \
+            max(t+op.source.duration+self.__tails.get(op.source, 0) for op, t in start_times.items()) \
+                <= self.__lower_bound
+
+        # solve the full model, or add the disjunctive pairs on request
+        if optimal:
+            logging.info('Initial solution reaches the lower bound.')
+            values = None
+        elif self.__lazy:
+            values = self.__solve_lazy(solution, combinations, sequences, windows, start_times)
+        else:
+            model, variables = self.__create_model(solution, combinations, sequences, windows, start_times)
+            values = self.__solve_model(model, variables, self.__max_time, start_times)
+
+        # assign pulp solution back to JSPSolution, or keep the initial solution if no better one
+        # is found, e.g. time out before the MIP start is accepted
+        if values:
+            for op, value in values.items():
+                op.update_start_time(value)
+        elif start_times:
+            for op, start_time in start_times.items():
+                op.update_start_time(start_time)
+        else:
+            raise JSPException('No feasible solution found.')
         problem.update_solution(solution) # update solution
 
 
-    def __create_model(self, solution:CFSSolution):
-        '''Create PuLP model: variables, constraints and objective.'''
+    def __solve_model(self, model:pulp.LpProblem, variables:dict, max_time:int=None,
+                        start_times:dict=None) -> dict:
+        '''Solve the model with backend.
+
+        Args:
+            model (pulp.LpProblem): Model to solve.
+            variables (dict): {op: start time variable}.
+            max_time (int, optional): Max solving time in seconds. Defaults to None.
+            start_times (dict, optional): Initial start times, which are set to the model as MIP
+                start. Defaults to None.
+
+        Returns:
+            dict: {op: start time} of the integer solution, or None if not found.
+        '''
+        solver_cmd = self.SOLVER_DICT.get(self.__solver_name.upper(), pulp.PULP_CBC_CMD)
+        kwargs = {'warmStart': True} if start_times else {}
+        log_path = self.__log_path
+        try:
+            if not self.__stream:
+                solver = solver_cmd(msg=self.__msg, timeLimit=max_time, options=[f'set logfile {log_path}'], **kwargs)
+                model.solve(solver)
+            else:
+                if not log_path:
+                    fd, log_path = tempfile.mkstemp(suffix='.log')
+                    os.close(fd)
+                solver = solver_cmd(msg=self.__msg, timeLimit=max_time, options=[f'set logfile {log_path}'],
+                                    logPath=log_path, **kwargs)
+                self.__solve_and_watch(model, solver, log_path)
+        except pulp.PulpSolverError:
+            # the backend may exit abnormally without any solution, e.g. CBC rejects the MIP
+            # start and times out: the initial solution is still valid
+            if not start_times: raise
+            return None
+        finally:
+            if log_path and not self.__log_path and os.path.exists(log_path): os.remove(log_path)
+
+        if model.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return None
+        return {op: var.varValue for op, var in variables.items()}
+
+
+    def __solve_lazy(self, solution:CFSSolution, combinations:list, sequences:list,
+                        windows:tuple=None, start_times:dict=None) -> dict:
+        '''Cutting-plane loop for the disjunctive constraints: solve the model without any pair
+        of operations on same edge first, then add binary variables and big-M constraints only for
+        the pairs overlapped in the result, and repeat until no overlap. A schedule without overlap
+        is feasible, and optimal if each round is solved to optimality, since the model of each
+        round is a relaxation of the full one. The full model is solved with the remaining time if
+        no convergence in `max_rounds` rounds, or a round finds no solution within half of the 
+        remaining time.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            combinations (list): Candidate pairs to add, see `__disjunctive_pairs()`.
+            sequences (list): Pairs of operations with fixed sequence, which are always added.
+            windows (tuple, optional): Horizon and time windows, see `__time_windows()`.
+            start_times (dict, optional): Initial start times, which are feasible to each round.
+
+        Returns:
+            dict: {op: start time} without overlap, or None if not found within the time limit.
+        '''
+        start = time.perf_counter()
+        remaining_time = lambda: None if self.__max_time is None else \
+                            int(self.__max_time - (time.perf_counter()-start))
+        pairs, candidates = [], combinations
+        self.__num_rounds = 0
+        while self.__num_rounds < self.__max_rounds:
+            max_time = remaining_time()
+            if max_time is not None:
+                if max_time < 2: break
+                max_time //= 2 # leave the other half to the full model
+
+            model, variables = self.__create_model(solution, pairs, sequences, windows, start_times)
+            values = self.__solve_model(model, variables, max_time, start_times)
+            self.__num_rounds += 1
+            if values is None: break
+
+            # overlapped pairs
+            def overlap(op_a, op_b):
+                end_time = min(values[op_a]+op_a.source.duration, values[op_b]+op_b.source.duration)
+                return end_time - max(values[op_a], values[op_b]) > 1e-6
+            conflicts = [pair for pair in candidates if overlap(*pair)]
+            logging.info(f'Round {self.__num_rounds}: {len(conflicts)} overlapped pairs added to {len(pairs)}')
+            if not conflicts: return values
+
+            pairs.extend(conflicts)
+            conflicts = set(conflicts)
+            candidates = [pair for pair in candidates if pair not in conflicts]
+
+        # fall back to the full model
+        max_time = remaining_time()
+        if max_time is not None and max_time < 1: return None
+        logging.info(f'No convergence in {self.__num_rounds} rounds: solve the full model.')
+        model, variables = self.__create_model(solution, pairs+candidates, sequences, windows, start_times)
+        return self.__solve_model(model, variables, max_time, start_times)
+
+
+    def __solve_and_watch(self, model:pulp.LpProblem, solver, log_path:str, interval:float=1.0):
+        '''Run the backend in a separate thread, and parse improving objectives from the newly 
+        appended log lines in the meantime.
+
+        Args:
+            model (pulp.LpProblem): Model to solve.
+            solver: PuLP solver command.
+            log_path (str): Log file of the backend.
+            interval (float, optional): Interval in seconds to read the log. Defaults to 1.0.
+        '''
+        errors = []
+        def run():
+            try:
+                model.solve(solver)
+            except Exception as e:
+                errors.append(e)
+
+        self.__incumbents = []
+        pattern = re.compile(self.INCUMBENT_PATTERNS.get(self.__solver_name.upper(), r'(?!)'))
+        best = float('inf')
+
+        # skip existing content: the file might be truncated by backend later
+        pos = os.path.getsize(log_path) if os.path.exists(log_path) else 0
+        line = ''
+        start = time.perf_counter()
+        thread = Thread(target=run)
+        thread.start()
+        while True:
+            alive = thread.is_alive()
+            if os.path.exists(log_path):
+                if os.path.getsize(log_path) < pos: pos, line = 0, ''
+                with open(log_path, 'r', errors='ignore') as f:
+                    f.seek(pos)
+                    lines = (line + f.read()).split('\n')
+                    pos = f.tell()
+                line = lines.pop() # incomplete line
+                for match in filter(None, map(pattern.search, lines)):
+                    try:
+                        objective = float(match.group(1))
+                        user_time = float(match.group(2)) if pattern.groups>1 else time.perf_counter()-start
+                    except ValueError:
+                        continue
+                    if objective >= best: continue
+                    best = objective
+                    self.__incumbents.append((round(user_time, 1), objective))
+                    logging.info(f'Incumbent: {objective}')
+                    if self.__incumbent_callback: self.__incumbent_callback(round(user_time, 1), objective)
+            if not alive: break
+            time.sleep(interval)
+
+        thread.join()
+        if errors: raise errors[0]
+
+
+    def __initial_start_times(self, solution:CFSSolution, initial:CFSSolution, release_times:dict=None) -> dict:
+        '''Start times of operation steps for MIP start. The sequence of operations on each edge 
+        is taken from the initial solution, while the start times are re-calculated by the longest
+        path in the graph of coflow precedence and edge sequence, since dispatching rules schedule 
+        operations by the flow chain rather than coflow DAG.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            initial (CFSSolution): Initial solution.
+            release_times (dict, optional): The earliest start time of each operation step, e.g.
+                the fixed start time. Defaults to None, i.e. 0.
+
+        Returns:
+            dict: {op: start time}, or None if the edge sequence conflicts with the precedence, 
+                or pushes back a fixed operation.
+        '''
+        # edge sequence from the initial solution
+        initial_times = {op.source: op.start_time for op in initial.ops}
+        index, arcs = self.__precedence_arcs(solution)
+        for _, ops in solution.edge_ops.items():
+            ops = sorted(ops, key=lambda op: initial_times[op.source])
+            arcs.extend((index[op], index[next_op]) for op, next_op in zip(ops, ops[1:]))
+
+        # the earliest start time, i.e. the head in the graph
+        release_times = release_times or {}
+        res = IndexedGraph.from_edges(len(solution.ops), arcs).heads_and_tails(
+                [op.source.duration for op in solution.ops], 
+                [release_times.get(op, 0.0) for op in solution.ops])
+        if res is None:
+            logging.info('Initial solution ignored: edge sequence conflicts with coflow precedence.')
+            return None
+        start_times = dict(zip(solution.ops, res[0].tolist()))
+        
+        # fixed operations must not be changed
+        for op in solution.ops:
+            if self.__fixed_times and op.source in self.__fixed_times and \
+                start_times[op]!=self.__fixed_times[op.source]:
+                logging.info('Initial solution ignored: fixed operations are changed.')
+                return None
+        return start_times
+
+
+    def __fixed_windows(self, solution:CFSSolution):
+        '''Time window of each operation step when some operations are fixed: the window of fixed
+        operation is its start time, while the free operation starts after the fixed predecessors
+        and completes before the fixed successors, within the horizon, i.e. the end time of fixed 
+        operations plus the total duration of free operations.
+
+        Returns:
+            tuple: (horizon, {op: release time}, {op: latest start time})
+        '''
+        fixed_times = {op: self.__fixed_times[op.source] for op in solution.ops \
+                            if op.source in self.__fixed_times}
+        horizon = max((t+op.source.duration for op, t in fixed_times.items()), default=0) + \
+                    sum(op.source.duration for op in solution.ops if op not in fixed_times)
+
+        # heads and tails in coflow DAG, where the fixed operations are released at the fixed
+        # start time, and followed by the time after its completion within the horizon
+        _, arcs = self.__precedence_arcs(solution)
+        heads, tails = IndexedGraph.from_edges(len(solution.ops), arcs).heads_and_tails(
+                [op.source.duration for op in solution.ops],
+                [fixed_times.get(op, 0.0) for op in solution.ops],
+                [horizon-op.source.duration-fixed_times[op] if op in fixed_times else 0.0 for op in solution.ops])
+        release_times, latest_times = {}, {}
+        for op, head, tail in zip(solution.ops, heads.tolist(), tails.tolist()):
+            release_times[op] = fixed_times.get(op, head)
+            latest_times[op] = fixed_times.get(op, horizon-op.source.duration-tail)
+
+        return horizon, release_times, latest_times
+
+
+    @staticmethod
+    def __precedence_arcs(solution:CFSSolution) -> tuple:
+        '''Arcs of coflow DAG over the position of operation steps in `solution.ops`.
+
+        Returns:
+            tuple: ({op: position}, [(position_from, position_to)])
+        '''
+        index = {op: i for i, op in enumerate(solution.ops)}
+        arcs = [(index[op], index[next_op]) for op, next_ops in solution.precedence.items() \
+                    for next_op in next_ops]
+        return index, arcs
+
+
+    def __heuristic_start_times(self, problem:CFSProblem, solution:CFSSolution) -> dict:
+        '''Start times of the schedule dispatched by the earliest start time in coflow DAG, 
+        which respects the precedence, so it is always a valid MIP start.
+
+        Args:
+            problem (CFSProblem): Problem to solve.
+            solution (CFSSolution): Solution to solve.
+
+        Returns:
+            dict: {op: start time}, see `__initial_start_times()`.
+        '''
+        heuristic = CFSSolution(problem)
+        DAGDispatchSolver(rule='est').solving_iteration(heuristic)
+        return self.__initial_start_times(solution, heuristic)
+
+
+    def __time_windows(self, solution:CFSSolution, start_times:dict):
+        '''Horizon from a heuristic schedule, and time window of each operation step: the release
+        time is the earliest start time in coflow, while the latest start time keeps the longest 
+        path to the end of coflow within the horizon.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            start_times (dict): Start times of the heuristic schedule, which is kept inside the 
+                time windows as MIP start.
+
+        Returns:
+            tuple: (horizon, {op: release time}, {op: latest start time})
+        '''
+        horizon = max(start_time+op.source.duration for op, start_time in start_times.items())
+
+        release_times, latest_times = {}, {}
+        for op in solution.ops:
+            flow, edge = op.source.flow, op.source.edge
+            activity = (edge.pred_node.id, edge.succ_node.id)
+            length = max(flow.etv.values()) # critical path length of coflow
+            release_times[op] = flow.ete[activity]
+            latest_times[op] = horizon - length + flow.lte[activity]
+
+        return horizon, release_times, latest_times
+
+
+    def __disjunctive_pairs(self, solution:CFSSolution, windows:tuple=None, start_times:dict=None):
+        '''Pairs of operations on same edge: the pairs to be sequenced by binary variables, and the
+        consecutive pairs whose sequence is kept from the initial solution when optimizing a
+        neighborhood.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            windows (tuple, optional): Horizon and time windows, see `__time_windows()`.
+            start_times (dict, optional): Initial start times, see `__initial_start_times()`.
+
+        Returns:
+            tuple: ([(op_a, op_b)] to sequence, [(op, next_op)] with fixed sequence)
+        '''
+        combinations, sequences = [], []
+        for _, ops in solution.edge_ops.items():
+            if self.__neighborhood is None:
+                combinations.extend(pulp.combination(ops, 2))
+                continue
+            # optimize the pairs involving operations in neighborhood only, and keep the sequence
+            # of the others
+            free_ops = [op for op in ops if op.source in self.__neighborhood]
+            other_ops = sorted((op for op in ops if op.source not in self.__neighborhood), key=start_times.get)
+            combinations.extend(pulp.combination(free_ops, 2))
+            combinations.extend((op_a, op_b) for op_a in free_ops for op_b in other_ops)
+            sequences.extend(zip(other_ops, other_ops[1:]))
+        if self.__fixed_times:
+            num = len(combinations)
+            combinations = self.__prune_pairs(combinations, windows)
+            self.__num_pruned = num - len(combinations)
+            logging.info(f'Pruned binaries: {self.__num_pruned} of {num}')
+        return combinations, sequences
+
+
+    def __create_model(self, solution:CFSSolution, combinations:list, sequences:list,
+                        windows:tuple=None, start_times:dict=None):
+        '''Create PuLP model: variables, constraints and objective.
+
+        Args:
+            solution (CFSSolution): Solution to solve.
+            combinations (list): Pairs of operations on same edge sequenced by binary variables,
+                see `__disjunctive_pairs()`.
+            sequences (list): Pairs of operations on same edge with fixed sequence.
+            windows (tuple, optional): Horizon and time windows, see `__time_windows()`. Defaults
+                to None, i.e. the sum of all durations for both upper bound and big-M.
+            start_times (dict, optional): Initial start times, see `__initial_start_times()`.
+                Defaults to None.
+        '''
         # create the model
         model = pulp.LpProblem("min_makespan", pulp.LpMinimize)
 
         # create variables
         # (1) start time of each operation
-        max_time = sum(op.source.duration for op in solution.ops) # upper bound of variables
-        variables = pulp.LpVariable.dicts(name='start_time', \
-                                        indices=solution.ops, \
-                                        lowBound=0, \
-                                        upBound=max_time, \
-                                        cat='Integer')
+        if windows:
+            max_time, release_times, latest_times = windows
+            max_time += max(self.__tails.values(), default=0)
+            variables = {op: pulp.LpVariable(name=f'start_time_{op.id}', \
+                                            lowBound=release_times[op], \
+                                            upBound=latest_times[op], \
+                                            cat='Integer') for op in solution.ops}
+        else:
+            max_time = sum(op.source.duration for op in solution.ops) # upper bound of variables
+            max_time += max(self.__tails.values(), default=0)
+            variables = pulp.LpVariable.dicts(name='start_time', \
+                                            indices=solution.ops, \
+                                            lowBound=0, \
+                                            upBound=max_time, \
+                                            cat='Integer')
 
         # (2) binary variable, i.e. 0 or 1, indicating the sequence of every two operations 
         # assigned in same machine
-        combinations = []
-        for _, ops in solution.edge_ops.items():
-            combinations.extend(pulp.combination(ops, 2))
         bin_vars =  pulp.LpVariable.dicts(name='binary_var', \
                                      indices=combinations, \
                                      lowBound=0, \
@@ -82,28 +562,36 @@ class PuLPSolver(JSSolver):
 
         # objective: makespan / flowtime
         s_max = pulp.LpVariable(name='max_start_time', \
-                                lowBound=0, \
+                                lowBound=self.__lower_bound, \
                                 upBound=max_time, \
                                 cat='Integer')
-        model += s_max        
+        if self.__tie_break:
+            free_vars = [var for op, var in variables.items() \
+                            if not self.__fixed_times or op.source not in self.__fixed_times]
+            # the total start time is less than 1 when weighted, so the integer makespan is 
+            # still minimized first
+            weight = 1.0 / (len(free_vars)*max_time + 1)
+            model += s_max + weight * pulp.lpSum(free_vars)
+        else:
+            model += s_max
         
         # apply constraints:
-        # (1) the max start time
-        for path in solution.path_ops:
-            last_op = path[-1]
-            model += (s_max-variables[last_op]) >= last_op.source.duration
+        # (1) the max start time: the last operations in coflow DAG
+        for op, next_ops in solution.precedence.items():
+            if not next_ops:
+                model += (s_max-variables[op]) >= op.source.duration
+        for op in solution.ops:
+            tail = self.__tails.get(op.source, 0)
+            if tail > 0: model += (s_max-variables[op]) >= op.source.duration + tail
 
         # for _, ops in solution.flow_ops.items():
         #     last_op = ops[-1]
         #     model += (s_max-variables[last_op]) >= last_op.source.duration
 
-        # (2) operation sequence inside a job
-        for path in solution.path_ops:
-            pre = None
-            for op in path:
-                if pre:
-                    model += (variables[op]-variables[pre]) >= pre.source.duration
-                pre = op
+        # (2) operation sequence inside a job: precedence in coflow DAG
+        for op, next_ops in solution.precedence.items():
+            for next_op in next_ops:
+                model += (variables[next_op]-variables[op]) >= op.source.duration
         
         # pre = None
         # for op in solution.ops:
@@ -112,8 +600,49 @@ class PuLPSolver(JSSolver):
         #     pre = op
 
         # (3) no overlap for operations assigned to same machine
+        for op, next_op in sequences:
+            model += (variables[next_op]-variables[op]) >= op.source.duration
         for op_a, op_b in combinations:
-            model += (variables[op_a]-variables[op_b]) >= (op_b.source.duration - max_time*(1-bin_vars[op_a, op_b]))
-            model += (variables[op_b]-variables[op_a]) >= (op_a.source.duration - max_time*bin_vars[op_a, op_b])
+            # big-M: the max violation of each constraint within time windows
+            if windows:
+                m_ab = latest_times[op_b] + op_b.source.duration - release_times[op_a]
+                m_ba = latest_times[op_a] + op_a.source.duration - release_times[op_b]
+            else:
+                m_ab = m_ba = max_time
+            model += (variables[op_a]-variables[op_b]) >= (op_b.source.duration - m_ab*(1-bin_vars[op_a, op_b]))
+            model += (variables[op_b]-variables[op_a]) >= (op_a.source.duration - m_ba*bin_vars[op_a, op_b])
+
+        # initial values: start time, sequence of operations on edge, i.e. 1 if op_a after op_b, 
+        # and the makespan
+        if start_times:
+            for op, var in variables.items():
+                var.setInitialValue(start_times[op])
+            for (op_a, op_b), var in bin_vars.items():
+                var.setInitialValue(int(start_times[op_a]>start_times[op_b]))
+            s_max.setInitialValue(max(start_times[op]+op.source.duration+self.__tails.get(op.source, 0) \
+                                        for op in solution.ops))
 
         return model, variables
+
+
+    @staticmethod
+    def __prune_pairs(combinations:list, windows:tuple) -> list:
+        '''Remove the pairs of operations whose sequence is fixed by the time windows, i.e. one 
+        operation must complete before the release time of the other one, e.g. two fixed 
+        operations, so no overlap is guaranteed without the binary variable.
+
+        NOTE: the windows derived from coflow only, i.e. without fixed operations, hardly separate
+        any pair even if the horizon is the lower bound, since each coflow is short compared with
+        the horizon; two operations on same edge never belong to one coflow either.
+
+        Args:
+            combinations (list): Pairs of operations assigned to same edge.
+            windows (tuple): Horizon and time windows, see `__fixed_windows()`.
+
+        Returns:
+            list: The remaining pairs.
+        '''
+        _, release_times, latest_times = windows
+        return [(op_a, op_b) for op_a, op_b in combinations \
+                    if latest_times[op_a]+op_a.source.duration > release_times[op_b] and \
+                        latest_times[op_b]+op_b.source.duration > release_times[op_a]]
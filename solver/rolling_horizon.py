@@ -0,0 +1,176 @@
+'''
+Rolling-horizon ILP for large instances: operations are sorted by the start time of a dispatching
+rule schedule, then a window of operations is optimized exactly by `PuLPSolver` with a short time
+limit, where the previously scheduled operations are fixed and the succeeding ones are ignored.
+The first part of the window is left-shifted and fixed then, and the window slides forward.
+
+The objective of each window is the projected makespan: each operation in window is followed by
+a tail, i.e. the longer one of the remaining work in coflow and the unscheduled load on its edge.
+
+The rule schedule is published first, and replaced only if a better schedule is found; the
+remaining operations are appended to the edges in rule order once the time budget is spent. No
+window is solved if the rule schedule reaches the lower bound already.
+'''
+
+import time
+from collections import defaultdict
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from solver.dag_dispatching import DAGDispatchSolver
+from solver.pulp import PuLPSolver
+
+
+class RollingHorizonSolver(JSSolver):
+
+    def __init__(self, name:str='rolling_horizon', rule:str='est', window:int=40, step:int=20,
+                    max_time:int=600, window_time:int=5, solver_name:str='CBC') -> None:
+        '''Solve problem window by window with `PuLPSolver`.
+
+        Args:
+            name (str, optional): Solver name.
+            rule (str, optional): Rule name of `DAGDispatchSolver` to sort operations. Defaults to
+                'est'.
+            window (int, optional): Count of operations optimized in each window. Defaults to 40.
+            step (int, optional): Count of operations fixed after solving each window. Defaults
+                to 20.
+            max_time (int, optional): Time budget in seconds. Defaults to 600.
+            window_time (int, optional): Max solving time of each window. Defaults to 5.
+            solver_name (str, optional): MIP solver name of `PuLPSolver`. Defaults to 'CBC'.
+        '''
+        super().__init__(name)
+        if not 0 < step <= window:
+            raise JSPException('Invalid window size.')
+        self.__rule = rule
+        self.__window = window
+        self.__step = step
+        self.__max_time = max_time
+        self.__window_time = window_time
+        self.__solver_name = solver_name
+
+
+    def do_solve(self, problem:CFSProblem):
+        start = time.perf_counter()
+
+        # sort operations by the start time of rule schedule, which keeps coflow precedence
+        initial = CFSSolution(problem)
+        DAGDispatchSolver(rule=self.__rule).solving_iteration(initial)
+        problem.update_solution(initial)
+        if initial.makespan <= problem.bounds.value(jackson=True): return
+        ops = sorted(problem.ops, key=lambda op: initial.find(op).start_time)
+
+        # predecessors in coflow DAG
+        precedence = problem.precedence
+        predecessors = defaultdict(list)
+        for op, next_ops in precedence.items():
+            for next_op in next_ops: predecessors[next_op].append(op)
+
+        # remaining work in coflow after each operation, by the reversed topological order
+        tails = {}
+        for op in reversed(ops):
+            tails[op] = max((next_op.duration+tails[next_op] for next_op in precedence[op]), default=0)
+        
+        # unscheduled load on each edge
+        edge_loads = defaultdict(float)
+        for op in ops: edge_loads[op.edge] += op.duration
+
+        fixed_times = {}                # op -> start time
+        edge_ops = defaultdict(list)    # edge -> fixed ops
+        edge_times = defaultdict(float) # edge -> end time of the last fixed op
+        def fix(op, start_time):
+            fixed_times[op] = start_time
+            edge_ops[op.edge].append(op)
+            edge_times[op.edge] = max(edge_times[op.edge], start_time+op.duration)
+
+        # optimize window by window
+        pos = 0
+        while pos < len(ops):
+            remaining = self.__max_time - (time.perf_counter()-start)
+            if remaining < 1: break
+
+            window_ops = ops[pos:pos+self.__window]
+            loads = defaultdict(float, edge_loads)
+            for op in window_ops: loads[op.edge] -= op.duration
+            window_tails = {op: max(tails[op], loads[op.edge]) for op in window_ops}
+            start_times = self.__solve_window(window_ops, window_tails, fixed_times, edge_ops, 
+                                    edge_times, predecessors, min(self.__window_time, int(remaining)))
+
+            # left-shift and fix the first part
+            if pos+len(window_ops) < len(ops): window_ops = window_ops[:self.__step]
+            for op in sorted(window_ops, key=start_times.get):
+                fix(op, self.__left_shift(op, start_times[op], fixed_times, edge_ops, predecessors))
+                edge_loads[op.edge] -= op.duration
+            pos += len(window_ops)
+
+        # append the remaining operations
+        for op in ops[pos:]:
+            fix(op, self.__earliest_start_time(op, fixed_times, edge_times, predecessors))
+
+        # final solution
+        solution = CFSSolution(problem)
+        for op, start_time in fixed_times.items():
+            solution.find(op).update_start_time(start_time)
+        if solution.makespan < initial.makespan: problem.update_solution(solution)
+
+
+    def __solve_window(self, window_ops:list, tails:dict, fixed_times:dict, edge_ops:dict, 
+                        edge_times:dict, predecessors:dict, max_time:int) -> dict:
+        '''Optimize the start time of operations in window, with the associated fixed operations:
+        the predecessors in coflow DAG and operations on the same edges not completed before the
+        window operations are released.
+
+        Returns:
+            dict: {op: start time} of window operations.
+        '''
+        # append window operations in rule order, i.e. the initial solution
+        start_times = dict(fixed_times)
+        edge_times = defaultdict(float, edge_times)
+        for op in window_ops:
+            start_times[op] = self.__earliest_start_time(op, start_times, edge_times, predecessors)
+            edge_times[op.edge] = start_times[op] + op.duration
+
+        # associated fixed operations
+        release_times = {}  # op -> the earliest start time after all predecessors
+        edge_releases = defaultdict(lambda: float('inf')) # edge -> min release time
+        related_ops = set()
+        for op in window_ops: # in topological order
+            release_times[op] = max((release_times[pre]+pre.duration if pre in release_times else \
+                fixed_times[pre]+pre.duration for pre in predecessors[op]), default=0)
+            edge_releases[op.edge] = min(edge_releases[op.edge], release_times[op])
+            related_ops.update(pre for pre in predecessors[op] if pre in fixed_times)
+        for edge, release_time in edge_releases.items():
+            related_ops.update(op for op in edge_ops[edge] if fixed_times[op]+op.duration > release_time)
+
+        # solve sub-problem
+        ops = window_ops + list(related_ops)
+        sub_problem = CFSProblem(ops=ops)
+        initial = CFSSolution(sub_problem)
+        for op in ops: initial.find(op).update_start_time(start_times[op])
+        solver = PuLPSolver(solver_name=self.__solver_name,
+                            max_time=max_time,
+                            initial_solution=initial,
+                            fixed_times={op: fixed_times[op] for op in related_ops},
+                            tails=tails,
+                            tie_break=True)
+        solver.do_solve(sub_problem)
+        return {op: sub_problem.solution.find(op).start_time for op in window_ops}
+
+
+    @staticmethod
+    def __left_shift(op, start_time:float, fixed_times:dict, edge_ops:dict, predecessors:dict) -> float:
+        '''Move operation to the earliest start time after the predecessors in coflow DAG and the 
+        previous fixed operation on the same edge, which keeps the sequence of operations.'''
+        release_time = max((fixed_times[pre]+pre.duration for pre in predecessors[op]), default=0)
+        for pre in edge_ops[op.edge]:
+            end_time = fixed_times[pre] + pre.duration
+            if end_time <= start_time: release_time = max(release_time, end_time)
+        return min(start_time, release_time)
+
+
+    @staticmethod
+    def __earliest_start_time(op, start_times:dict, edge_times:dict, predecessors:dict) -> float:
+        '''Earliest start time after the predecessors in coflow DAG and the scheduled operations on
+        the same edge.'''
+        start_time = max((start_times[pre]+pre.duration for pre in predecessors[op]), default=0)
+        return max(start_time, edge_times[op.edge])
@@ -0,0 +1,318 @@
+'''
+Tabu search on the disjunctive graph model of `CFSSolution`, i.e. the flow chain and edge chain,
+starting from the schedule of a dispatching rule. The flow chain is linked in a topological order
+of coflow DAG, so that any acyclic edge chain gives a schedule respecting the precedence.
+
+NOTE: the parallel branches of a flow are serialized in the chain, so the searched schedules are 
+limited by the chain model, which may be worse than dispatching on coflow DAG for wide DAGs. So 
+the better one of the rule schedule and the best `DAGDispatchSolver` schedule over its rules is
+published first, and the latter, re-timed on the chain, also seeds the search if better than the
+rule schedule.
+
+Each iteration extracts a critical path from the heads and tails of operations, and splits it
+into critical blocks, i.e. the maximal sequences of adjacent operations on same edge. Moves are
+taken from the neighborhoods on critical blocks:
+
+- N5 : swap the first two or the last two operations of a block, except the first two of the
+       first block and the last two of the last block
+- N6 : move an operation of a block to the front of the block, or to the end of the block, if
+       no cycle is guaranteed by the heads and tails (Balas & Vazacopoulos, 1998)
+
+Moves are scored by the estimated makespan, i.e. the heads and tails of the reordered operations
+are updated locally from the neighbors, rather than a full evaluation of the schedule. The best
+move not tabu, or better than the best schedule (aspiration), is applied by `CFSSolution.move()`;
+the reversed pairs of operations are then tabu for `tenure` iterations. The search jumps back to
+the best schedule by `CFSSolution.rollback()` if no improvement in `max_stagnation` iterations,
+and continues with a move not tried from there yet.
+
+Nowicki, E. and Smutnicki, C. "A fast taboo search algorithm for the job shop problem."
+Management Science 42.6 (1996): 797-813.
+'''
+
+import time
+from jsp_fwk.common.exception import JSPException
+from jsp_fwk.model.solver import JSSolver
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from model.variable import TransOperationStep
+from solver.dispatching_rule import PriorityDispatchSolver
+from solver.dag_dispatching import DAGDispatchSolver
+
+
+class TabuSearchSolver(JSSolver):
+
+    def __init__(self, name:str='tabu', rule:str='hh', max_time:int=60, max_iterations:int=None,
+                    tenure:int=10, neighborhood:str='N6', max_stagnation:int=200) -> None:
+        '''Improve the schedule of a dispatching rule by tabu search.
+
+        Args:
+            name (str, optional): Solver name.
+            rule (str, optional): Rule name of `PriorityDispatchSolver` for the initial solution.
+                Defaults to 'hh'.
+            max_time (int, optional): Time budget in seconds. Defaults to 60.
+            max_iterations (int, optional): Max count of iterations. Defaults to None, i.e. no
+                limit.
+            tenure (int, optional): Count of iterations a reversed pair of operations is tabu.
+                Defaults to 10.
+            neighborhood (str, optional): 'N5' or 'N6', where N6 includes the N5 moves. Defaults
+                to 'N6'.
+            max_stagnation (int, optional): Count of iterations without improvement before
+                jumping back to the best schedule. Defaults to 200.
+        '''
+        super().__init__(name)
+        self.__rule = rule
+        self.__max_time = max_time
+        self.__max_iterations = max_iterations
+        self.__tenure = tenure
+        self.__max_stagnation = max_stagnation
+        self.__neighborhood = neighborhood.upper()
+        if self.__neighborhood not in ('N5', 'N6'):
+            raise JSPException('Invalid neighborhood.')
+
+        self.__num_iterations = 0
+
+
+    @property
+    def num_iterations(self) -> int:
+        '''Count of applied moves.'''
+        return self.__num_iterations
+
+
+    def do_solve(self, problem:CFSProblem):
+        start = time.perf_counter()
+
+        # initial solutions: the rule schedule on the topological flow chain, and the best 
+        # schedule dispatched on coflow DAG, where the better one is published
+        initial = CFSSolution(problem, topological=True)
+        PriorityDispatchSolver(rule=self.__rule).solving_iteration(initial)
+        if not initial.is_feasible():
+            raise JSPException('Infeasible initial solution.')
+        heuristic = None
+        for rule in DAGDispatchSolver.RULES:
+            solution = CFSSolution(problem)
+            DAGDispatchSolver(rule=rule).solving_iteration(solution)
+            if not heuristic or solution.makespan < heuristic.makespan: heuristic = solution
+        published = min(initial, heuristic, key=lambda solution: solution.makespan)
+        problem.update_solution(published)
+        published = published.makespan
+
+        # seed the search with the better one on the chain
+        seed = self.__chain_solution(problem, heuristic)
+        if not seed or seed.makespan >= initial.makespan: seed = initial
+
+        # search on a copy, since the published solution is kept unchanged; stop once reaching
+        # the lower bound of coflow DAG
+        bound = problem.bounds.value(jackson=True)
+        solution = seed.copy()
+        search = _TabuSearch(solution, self.__tenure, self.__neighborhood, self.__max_stagnation)
+        best = search.makespan
+        self.__num_iterations = 0
+        while published > bound:
+            if time.perf_counter()-start >= self.__max_time: break
+            if self.__max_iterations and self.__num_iterations >= self.__max_iterations: break
+            if not search.step(best): break
+            self.__num_iterations += 1
+
+            # publish the improvement
+            if search.makespan >= best: continue
+            best = search.makespan
+            if best < published and solution.is_feasible():
+                published = best
+                problem.update_solution(solution.copy())
+
+
+    @staticmethod
+    def __chain_solution(problem:CFSProblem, schedule:CFSSolution) -> CFSSolution:
+        '''Solution on the topological flow chain with the edge sequences of `schedule`, i.e. 
+        re-timed by the chain model.
+
+        Returns:
+            CFSSolution: The solution, or None if the edge sequences conflict with the chain.
+        '''
+        start_times = {op.source: op.start_time for op in schedule.ops}
+        solution = CFSSolution(problem, topological=True)
+        for edge_step, ops in solution.edge_ops.items():
+            pre = edge_step
+            for op in sorted(ops, key=lambda op: start_times[op.source]):
+                op.pre_edge_op = pre
+                pre = op
+        return solution if solution.evaluate() else None
+
+
+class _TabuSearch:
+
+    def __init__(self, solution:CFSSolution, tenure:int, neighborhood:str, max_stagnation:int) -> None:
+        '''State of tabu search on `solution`, which is changed in place by the moves.'''
+        self.__solution = solution
+        self.__index = {op: i for i, op in enumerate(solution.ops)}
+        self.__durations = [op.source.duration for op in solution.ops]
+        self.__tenure = tenure
+        self.__neighborhood = neighborhood
+        self.__max_stagnation = max_stagnation
+
+        self.__tabu = {} # (op_a, op_b) -> iteration until which a before b is tabu
+        self.__iteration = 0
+        if not self.__evaluate():
+            raise JSPException('Cycle exists in initial solution.')
+
+        # moves since the best solution are recorded for jumping back
+        self.__best = self.__makespan
+        self.__stagnation = 0
+        self.__at_best = True
+        self.__tried = set() # moves applied from the best solution: {(op, pre_edge_op)}
+        solution.checkpoint()
+
+
+    @property
+    def makespan(self) -> float: return self.__makespan
+
+
+    def step(self, best:float) -> bool:
+        '''Apply the best admissible move.
+
+        Args:
+            best (float): Makespan of the best solution, for aspiration.
+
+        Returns:
+            bool: False if no move is available.
+        '''
+        self.__iteration += 1
+        moves = [] # (tabu, estimate, op, pre_edge_op, created pairs)
+        for op, pre_edge_op, window, pairs in self.__moves():
+            if self.__at_best and (op, pre_edge_op) in self.__tried: continue
+            estimate = self.__estimate(*window)
+            tabu = any(self.__tabu.get(pair, 0) > self.__iteration for pair in pairs) and estimate >= best
+            moves.append((tabu, estimate, op, pre_edge_op, pairs))
+        if not moves: return False
+
+        # the best move not tabu, or the best of all if all tabu
+        _, _, op, pre_edge_op, pairs = min(moves, key=lambda move: move[:2])
+        if not self.__solution.move(op, pre_edge_op): # kept unchanged if a cycle exists
+            for pair in pairs: self.__tabu[pair] = self.__iteration + self.__tenure
+            return True
+        if self.__at_best:
+            self.__tried.add((op, pre_edge_op))
+            self.__at_best = False
+        self.__evaluate()
+
+        # forbid restoring the original order
+        for a, b in pairs: self.__tabu[(b, a)] = self.__iteration + self.__tenure
+
+        # keep the best solution, or jump back to it after stagnation
+        if self.__makespan < self.__best:
+            self.__best = self.__makespan
+            self.__stagnation = 0
+            self.__at_best = True
+            self.__tried.clear()
+            self.__solution.commit(0)
+            self.__solution.checkpoint()
+        else:
+            self.__stagnation += 1
+            if self.__stagnation >= self.__max_stagnation: self.__jump_back()
+        return True
+
+
+    def __jump_back(self):
+        '''Restore the best solution by undoing the moves since then.'''
+        self.__solution.rollback(0)
+        self.__solution.checkpoint()
+        self.__evaluate()
+        self.__stagnation = 0
+        self.__at_best = True
+
+
+    def __evaluate(self) -> bool:
+        '''Heads and tails of all operations from the disjunctive graph of solution.
+
+        Returns:
+            bool: False if cycle exists.
+        '''
+        res = self.__solution.heads_and_tails()
+        if res is None: return False
+        self.__heads, self.__tails = res[0].tolist(), res[1].tolist()
+        self.__makespan = max(h+d+t for h, d, t in zip(self.__heads, self.__durations, self.__tails))
+        return True
+
+
+    def __critical_blocks(self) -> list:
+        '''Blocks of a critical path: [[op, ...], ...].'''
+        heads, tails, durations = self.__heads, self.__tails, self.__durations
+        index, makespan = self.__index, self.__makespan
+        critical = lambda op: isinstance(op, TransOperationStep) and \
+                        heads[index[op]]+durations[index[op]]+tails[index[op]]==makespan
+
+        # walk from a critical operation without tail to the start
+        op = next(op for op in self.__solution.ops if critical(op) and tails[index[op]]==0)
+        path = [op]
+        while heads[index[op]] > 0:
+            head = heads[index[op]]
+            op = next(step for step in (op.pre_edge_op, op.pre_flow_op) \
+                        if critical(step) and heads[index[step]]+durations[index[step]]==head)
+            path.append(op)
+        path.reverse()
+
+        blocks = [[path[0]]]
+        for op, next_op in zip(path, path[1:]):
+            if op.next_edge_op is next_op:
+                blocks[-1].append(next_op)
+            else:
+                blocks.append([next_op])
+        return blocks
+
+
+    def __moves(self):
+        '''Candidate moves on critical blocks: (op, pre_edge_op, (pre, new segment, succ), pairs of
+        operations in reversed order), i.e. move `op` right after `pre_edge_op`, so that the
+        operations between `pre` and `succ` in edge chain are reordered to the new segment, and
+        pairs [(a, b)] where a is moved before b.'''
+        blocks = self.__critical_blocks()
+        heads, tails, durations, index = self.__heads, self.__tails, self.__durations, self.__index
+        length = lambda values, op: values[index[op]] + durations[index[op]]
+        last = len(blocks) - 1
+        for n, block in enumerate(blocks):
+            size = len(block)
+            if size < 2: continue
+
+            # N5: swap the first two and the last two operations
+            a, b = block[0], block[1]
+            if n > 0: yield b, a.pre_edge_op, (a.pre_edge_op, [b, a], b.next_edge_op), [(b, a)]
+            a, b = block[-2], block[-1]
+            if n < last and (size > 2 or n==0):
+                yield b, a.pre_edge_op, (a.pre_edge_op, [b, a], b.next_edge_op), [(b, a)]
+            if self.__neighborhood=='N5' or size < 3: continue
+
+            # N6: move an inner operation to the front or the end of block, if no cycle
+            first, end = block[0], block[-1]
+            pre, succ = first.pre_edge_op, end.next_edge_op
+            for m in range(2, size):
+                u, j = block[m], block[m].next_flow_op
+                if not j or length(tails, first) >= length(tails, j):
+                    yield u, pre, (pre, [u] + block[:m], u.next_edge_op), [(u, v) for v in block[:m]]
+            for m in range(size-2):
+                u, j = block[m], block[m].pre_flow_op
+                if not isinstance(j, TransOperationStep) or length(heads, end) >= length(heads, j):
+                    yield u, end, (u.pre_edge_op, block[m+1:] + [u], succ), [(v, u) for v in block[m+1:]]
+
+
+    def __estimate(self, pre, segment:list, succ) -> float:
+        '''Estimated makespan after the operations between `pre` and `succ` in edge chain are
+        reordered to `segment`: heads are updated along the new order from the preceding
+        operations, and tails in the reversed order from the succeeding ones.'''
+        heads, tails, durations, index = self.__heads, self.__tails, self.__durations, self.__index
+        length = lambda values, op: values[index[op]] + durations[index[op]] \
+                    if isinstance(op, TransOperationStep) else 0.0
+
+        new_heads = []
+        ref = length(heads, pre)
+        for op in segment:
+            ref = max(ref, length(heads, op.pre_flow_op))
+            new_heads.append(ref)
+            ref += durations[index[op]]
+
+        res = 0.0
+        ref = length(tails, succ)
+        for op, head in zip(reversed(segment), reversed(new_heads)):
+            ref = max(ref, length(tails, op.next_flow_op))
+            res = max(res, head+durations[index[op]]+ref)
+            ref += durations[index[op]]
+        return res
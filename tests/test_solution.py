@@ -0,0 +1,74 @@
+'''Tests on the linked steps model of solution.'''
+
+import random
+from model.problem import CFSProblem
+from model.solution import CFSSolution
+from solver.dispatching_rule import PriorityDispatchSolver
+
+
+def _edge_chain(edge_step):
+    '''Operations in the edge chain starting from the edge head.'''
+    ops, op = [], edge_step.next_edge_op
+    while op:
+        ops.append(op)
+        op = op.next_edge_op
+    return ops
+
+
+def _check_edge_chains(solution:CFSSolution):
+    for edge_step in solution.edge_ops:
+        ops = _edge_chain(edge_step)
+        assert edge_step.tailed_edge_op is (ops[-1] if ops else edge_step)
+        assert edge_step.service_time == sum(op.source.duration for op in ops)
+
+
+def test_edge_chain_cache_after_move():
+    problem = CFSProblem(benchmark='dag302_40')
+    solution = CFSSolution(problem)
+    PriorityDispatchSolver(rule='hh').solving_iteration(solution)
+    _check_edge_chains(solution) # fill the cache before moving
+    snapshot = solution.snapshot()
+
+    rnd, num = random.Random(0), 0
+    edges = [edge_step for edge_step in solution.edge_ops if len(_edge_chain(edge_step))>1]
+    while num < 20:
+        edge_step = rnd.choice(edges)
+        ops = _edge_chain(edge_step)
+        op, pre_edge_op = rnd.choice(ops), rnd.choice(ops + [edge_step])
+        if solution.move(op, pre_edge_op): num += 1
+        _check_edge_chains(solution)
+
+    # undo the moves
+    assert solution.restore(snapshot)
+    _check_edge_chains(solution)
+
+
+def test_precedence_with_topological_flow_chain():
+    problem = CFSProblem(benchmark='dag302_40')
+
+    # flow chain in the order of operations violates the precedence in coflow DAG
+    solution = CFSSolution(problem)
+    PriorityDispatchSolver(rule='hh').solving_iteration(solution)
+    assert not solution.is_feasible()
+
+    solution = CFSSolution(problem, topological=True)
+    PriorityDispatchSolver(rule='hh').solving_iteration(solution)
+    assert solution.is_feasible()
+    assert solution.copy().is_feasible()
+
+
+def test_features_follow_flow_chain():
+    problem = CFSProblem(benchmark='dag302_40')
+    for topological in (False, True):
+        solution = CFSSolution(problem, topological=topological)
+        features = solution.features
+        for flow_step in solution.flow_ops:
+            # walk the flow chain
+            ops, op = [], flow_step.next_flow_op
+            while op:
+                ops.append(op)
+                op = op.next_flow_op
+            work_remaining = 0.0
+            for op in reversed(ops):
+                work_remaining += op.source.duration
+                assert features.work_remaining[features.index(op)] == work_remaining